@@ -1,25 +1,44 @@
+"""Train the PCOS risk model with a cross-validated hyperparameter search.
+
+Every combination of forest size, depth and leaf size is scored with
+stratified k-fold cross-validation. The (configuration, fold) fits run in
+a process pool across all cores, each forest single-threaded. The
+finalists, every configuration whose CV accuracy is within --tolerance of
+the best, are then refit on the training split and profiled one after
+another in this process once the pool has shut down, so no timing shares
+the CPU with other fits. Next to their CV accuracy we record
+
+  * fit time (mean per fold and on the whole training split),
+  * inference latency: one row through predict_proba (p50/p95), the path
+    requests take when the risk engine has no lookup table, and the time
+    to score all 2**7 flag combinations, which the risk engine does on
+    every model reload,
+  * artifact size of the pickled model, and
+  * accuracy on the held-out test split.
+
+The served model is picked from the accuracy/latency Pareto front: the
+fastest configuration whose CV accuracy is within --tolerance of the best.
+
+    python Model_training.py
+    python Model_training.py --folds 10 --tolerance 0 --save search.json
+"""
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
-import joblib
-import os
+from sklearn.model_selection import StratifiedKFold, train_test_split
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# === Load dataset ===
-df = pd.read_csv("PCOS_dummy_dataset.csv")
-
-# === Preprocess ===
-# Simplify column names
-df.columns = [c.strip().replace(" ", "_").replace("?", "") for c in df.columns]
-
-# Replace textual categories with simpler values
-df = df.replace({
-    "None": 0, "Mild": 1, "Moderate": 2, "Severe": 3,
-    "Irregular": 1, "Regular": 0, "Absent": 1
-})
+SEED = 42
 
 # Select features aligned with frontend
 selected_features = [
@@ -32,21 +51,195 @@ selected_features = [
     "Pain"
 ]
 
-X = df[selected_features]
-y = df["Likely_PCOS"]
+# === Search space ===
+FOREST_SIZES = [25, 50, 100, 200, 400]
+MAX_DEPTHS = [None, 3, 5, 8]
+MIN_SAMPLES_LEAF = [1, 2, 5, 10]
+
+
+def load_dataset(path):
+    # keep_default_na=False: "None" is a severity (mapped to 0 below), not a missing value
+    df = pd.read_csv(path, keep_default_na=False)
+
+    # Simplify column names
+    df.columns = [c.strip().replace(" ", "_").replace("?", "") for c in df.columns]
+
+    # Replace textual categories with simpler values
+    df = df.replace({
+        "None": 0, "Mild": 1, "Moderate": 2, "Severe": 3,
+        "Irregular": 1, "Regular": 0, "Absent": 1
+    })
+    return df[selected_features].astype(np.int64), df["Likely_PCOS"].astype(np.int64)
+
+
+def search_space():
+    return [{"n_estimators": n, "max_depth": depth, "min_samples_leaf": leaf}
+            for n, depth, leaf in product(FOREST_SIZES, MAX_DEPTHS, MIN_SAMPLES_LEAF)]
+
+
+def make_model(params):
+    # n_jobs=1: the process pool already keeps every core busy
+    return RandomForestClassifier(random_state=SEED, n_jobs=1, **params)
+
+
+# === Pool task (module level, so worker processes can unpickle it) ===
+def fit_fold(task):
+    params, X_train, y_train, X_val, y_val = task
+    model = make_model(params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    return accuracy_score(y_val, model.predict(X_val)), fit_s
+
+
+# === Profiling (in the parent process) ===
+def latency_ms(model, X_one, repeats):
+    # Per-call times of a one-row prediction, after one warm-up call
+    model.predict_proba(X_one)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X_one)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, [50, 95])
+
+
+def profile_model(params, X_train, y_train, X_test, y_test, repeats):
+    model = make_model(params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    p50, p95 = latency_ms(model, X_test.iloc[:1], repeats)
+    # Every 0/1 combination of the flags, as risk_engine.RiskEngine builds its table
+    n = len(selected_features)
+    combos = pd.DataFrame((np.arange(1 << n)[:, None] >> np.arange(n)) & 1, columns=selected_features)
+    start = time.perf_counter()
+    model.predict_proba(combos)
+    table_ms = (time.perf_counter() - start) * 1000
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return {
+        "full_fit_s": round(fit_s, 4),
+        "latency_p50_ms": round(float(p50), 3),
+        "latency_p95_ms": round(float(p95), 3),
+        "table_build_ms": round(table_ms, 2),
+        "artifact_kb": round(buffer.tell() / 1024, 1),
+        "test_accuracy": round(accuracy_score(y_test, model.predict(X_test)), 4),
+    }
+
+
+# === Search ===
+def cross_validate(pool, jobs, configs, X, y, folds):
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=SEED).split(X, y))
+    tasks = [(params, X.iloc[tr], y.iloc[tr], X.iloc[va], y.iloc[va]) for params in configs for tr, va in splits]
+    scores = list(pool.map(fit_fold, tasks, chunksize=max(1, len(tasks) // (4 * jobs))))
+
+    results = []
+    for i, params in enumerate(configs):
+        acc, fit_s = map(np.array, zip(*scores[i * folds:(i + 1) * folds]))
+        results.append({
+            "params": params,
+            "cv_accuracy": round(float(acc.mean()), 4),
+            "cv_std": round(float(acc.std()), 4),
+            "fold_fit_s": round(float(fit_s.mean()), 4),
+        })
+    return results
+
+
+def pareto_front(results):
+    """Results no other result beats on both CV accuracy and p50 latency, fastest first."""
+    front = []
+    best = -1.0
+    for r in sorted(results, key=lambda r: (r["latency_p50_ms"], -r["cv_accuracy"])):
+        if r["cv_accuracy"] > best:
+            front.append(r)
+            best = r["cv_accuracy"]
+    return front
+
+
+def choose(front, tolerance):
+    # The front is sorted by latency, so its last point is the most accurate
+    target = front[-1]["cv_accuracy"] - tolerance
+    return next(r for r in front if r["cv_accuracy"] >= target)
+
+
+def describe(params):
+    depth = params["max_depth"] if params["max_depth"] is not None else "-"
+    return f"trees={params['n_estimators']:<4} depth={depth:<3} leaf={params['min_samples_leaf']:<3}"
+
+
+def print_table(rows, chosen):
+    print(f"\n  {'configuration':<28}{'cv acc':>9}{'± std':>8}{'test acc':>10}{'fit s':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'table ms':>10}{'size KB':>10}")
+    for r in rows:
+        mark = " *" if r is chosen else ""
+        print(f"  {describe(r['params']):<28}{r['cv_accuracy']:>9.4f}{r['cv_std']:>8.4f}{r['test_accuracy']:>10.4f}"
+              f"{r['full_fit_s']:>8.3f}{r['latency_p50_ms']:>9.3f}{r['latency_p95_ms']:>9.3f}"
+              f"{r['table_build_ms']:>10.2f}{r['artifact_kb']:>10.1f}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "PCOS_dummy_dataset.csv"))
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "pcos_model.pkl"), help="where to save the chosen model")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="CV accuracy the chosen model may give up against the best for lower latency")
+    parser.add_argument("--latency-repeats", type=int, default=50, help="timed one-row predictions per model")
+    parser.add_argument("--save", help="write every configuration's results as JSON")
+    args = parser.parse_args()
+
+    # === Load dataset ===
+    X, y = load_dataset(args.data)
+
+    # === Train/Test Split ===
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEED)
+
+    # === Cross-validated search in the pool ===
+    configs = search_space()
+    print(f"🔎 {len(configs)} configurations x {args.folds} folds on {args.jobs} processes")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = cross_validate(pool, args.jobs, configs, X_train, y_train, args.folds)
+    print(f"✅ Search finished in {time.perf_counter() - start:.1f}s")
+
+    # === Refit and profile the finalists one at a time, on an idle machine ===
+    # Only configurations within the tolerance can be chosen, so only their
+    # latency matters; the others keep just their CV results
+    target = max(r["cv_accuracy"] for r in results) - args.tolerance
+    finalists = [r for r in results if r["cv_accuracy"] >= target]
+    print(f"⏱️  Profiling {len(finalists)} finalists")
+    for r in finalists:
+        r.update(profile_model(r["params"], X_train, y_train, X_test, y_test, args.latency_repeats))
+
+    # === Choose on the accuracy/latency Pareto front ===
+    front = pareto_front(finalists)
+    chosen = choose(front, args.tolerance)
+    best = front[-1]
+    print("\nPareto front (CV accuracy vs one-row latency):")
+    print_table(front, chosen)
+    print(f"\n  most accurate: {describe(best['params'])} cv {best['cv_accuracy']:.4f}, p50 {best['latency_p50_ms']:.3f} ms")
+    print(f"  chosen:        {describe(chosen['params'])} cv {chosen['cv_accuracy']:.4f}, "
+          f"p50 {chosen['latency_p50_ms']:.3f} ms (tolerance {args.tolerance})")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"folds": args.folds, "tolerance": args.tolerance, "chosen": chosen,
+                       "pareto_front": front, "results": results}, f, indent=2)
 
-# === Train/Test Split ===
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # === Evaluate ===
+    # Fitted on the training split only, like the test accuracy above
+    model = make_model(chosen["params"]).fit(X_train, y_train)
+    acc = accuracy_score(y_test, model.predict(X_test))
+    print(f"\n✅ Model Training Complete. Accuracy: {acc*100:.2f}%")
 
-# === Train Model ===
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+    # === Save model ===
+    joblib.dump(model, args.out)
+    print(f"✅ Model saved as {os.path.basename(args.out)}")
 
-# === Evaluate ===
-y_pred = model.predict(X_test)
-acc = accuracy_score(y_test, y_pred)
-print(f"✅ Model Training Complete. Accuracy: {acc*100:.2f}%")
 
-# === Save model ===
-joblib.dump(model, os.path.join(BASE_DIR, "pcos_model.pkl"))
-print("✅ Model saved as pcos_model.pkl")
+if __name__ == "__main__":
+    main()
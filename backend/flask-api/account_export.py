@@ -0,0 +1,98 @@
+"""Everything stored about one account, streamed as NDJSON or a zip of NDJSON files.
+
+Rows come from server-side cursors (``yield_per``) one table at a time and
+are written to the response as they arrive, so memory stays flat however
+much history an account has: at most EXPORT_BATCH rows and one
+EXPORT_CHUNK_BYTES output chunk are held at once.
+"""
+import os
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import select
+
+from extensions import db, read_bind
+from models import USER_TABLES, CycleEntry, PcosRiskEntry, User
+
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "500"))
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+# Rows are read in the order of each table's per-user index (default: id)
+EXPORT_ORDER = {"cycles": CycleEntry.created_at, "pcos_risk": PcosRiskEntry.created_at}
+
+
+def _rows(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH), bind_arguments=read_bind())
+    for row in result:
+        yield row._asdict()
+
+
+def export_tables(email):
+    """``(name, rows)`` per table; each ``rows`` iterator must be used up before the next."""
+    # The account itself, without the password hash
+    yield "account", _rows(select(User.id, User.name, User.email).where(User.email == email))
+    for name, model, column in USER_TABLES:
+        stmt = select(*model.__table__.columns).where(column == email)
+        yield name, _rows(stmt.order_by(EXPORT_ORDER.get(name, model.id)))
+
+
+def ndjson_stream(email, dumps):
+    """Lines of ``{"table": ..., "row": {...}}``, then one ``{"manifest": {...}}`` line."""
+    counts = {}
+    chunk = []
+    size = 0
+    for name, rows in export_tables(email):
+        counts[name] = 0
+        for row in rows:
+            line = dumps({"table": name, "row": row}) + "\n"
+            chunk.append(line)
+            size += len(line)
+            counts[name] += 1
+            if size >= EXPORT_CHUNK_BYTES:
+                yield "".join(chunk)
+                chunk, size = [], 0
+    chunk.append(dumps({"manifest": manifest(email, counts)}) + "\n")
+    yield "".join(chunk)
+
+
+class _ChunkWriter:
+    """Write-only, unseekable file for ZipFile; the generator takes what was written."""
+
+    def __init__(self):
+        self._parts = []
+        self.size = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts, self.size = [], 0
+        return data
+
+
+def zip_stream(email, dumps):
+    """A zip with one ``<table>.ndjson`` per table and ``manifest.json``, as it is written."""
+    out = _ChunkWriter()
+    counts = {}
+    # Without seek(), ZipFile writes sizes after each file's data instead of patching headers
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in export_tables(email):
+            counts[name] = 0
+            with archive.open(f"{name}.ndjson", "w") as f:
+                for row in rows:
+                    f.write(dumps(row).encode() + b"\n")
+                    counts[name] += 1
+                    if out.size >= EXPORT_CHUNK_BYTES:
+                        yield out.take()
+        archive.writestr("manifest.json", dumps(manifest(email, counts)))
+    yield out.take()
+
+
+def manifest(email, counts):
+    return {"email": email, "exported_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", "rows": counts}
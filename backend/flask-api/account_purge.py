@@ -0,0 +1,206 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, func, inspect, or_, select, update
+
+logger = logging.getLogger(__name__)
+
+
+class AccountPurger:
+    """Deletes the data of deleted accounts on a background thread.
+
+    delete_account only removes the user row and inserts a purge row, then
+    calls :meth:`notify`. The purger claims a due purge with a lease and
+    deletes the account's rows table by table in batches of ``batch_size``,
+    one short transaction each, so no request (or lock) waits on a large
+    account. Every batch commits its row counts to the purge's ``progress``
+    and renews the lease in the same transaction: after a crash another
+    worker picks the purge up once the lease expires and carries on where
+    the last commit left off. Failed purges are retried with backoff.
+    """
+
+    def __init__(self, app=None, db=None, model=None, tables=(), on_batch=None, on_done=None):
+        self.db = db
+        self.model = model
+        self.tables = list(tables)    # (name, model, email column), deleted in this order
+        self.on_batch = on_batch      # on_batch(table name, rows deleted)
+        self.on_done = on_done        # on_done(email), after the purge is recorded as done
+        self.app = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.rows_deleted = 0
+        self.purges_done = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        cfg = app.config
+        self.batch_size = int(cfg.get("ACCOUNT_PURGE_BATCH_SIZE", 500))
+        self.pause = float(cfg.get("ACCOUNT_PURGE_PAUSE", 0.05))
+        self.poll_interval = float(cfg.get("ACCOUNT_PURGE_POLL_INTERVAL", 60))
+        self.lease = float(cfg.get("ACCOUNT_PURGE_LEASE", 120))
+        self.backoff = float(cfg.get("ACCOUNT_PURGE_BACKOFF", 30))
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._start_lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="account-purge", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def notify(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    purged = self.purge_once()
+            except Exception:
+                logger.exception("Account purge failed")
+                purged = False
+            if purged:
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def drain(self):
+        # Finish every due purge right now (CLI / tests)
+        total = 0
+        with self.app.app_context():
+            while self.purge_once():
+                total += 1
+        return total
+
+    # ---------- claiming ----------
+    def _due(self, now):
+        m = self.model
+        return or_(
+            and_(m.status == "pending", m.next_attempt_at <= now),
+            and_(m.status == "purging", m.locked_until < now),   # lease expired (crashed worker)
+        )
+
+    def _claim(self):
+        m = self.model
+        session = self.db.session
+        now = datetime.utcnow()
+        purge_id = session.execute(select(m.id).where(self._due(now)).order_by(m.id).limit(1)).scalar()
+        if purge_id is None:
+            return None, None
+        token = uuid.uuid4().hex
+        claimed = session.execute(
+            update(m).where(m.id == purge_id, self._due(now))
+            .values(status="purging", claim_token=token, locked_until=now + timedelta(seconds=self.lease))
+        ).rowcount
+        session.commit()
+        if not claimed:
+            return None, None   # another worker got it first
+        return session.get(m, purge_id), token
+
+    def _checkpoint(self, purge, token, **values):
+        # Only while we still hold the lease; False if another worker took over
+        m = self.model
+        values.setdefault("locked_until", datetime.utcnow() + timedelta(seconds=self.lease))
+        return self.db.session.execute(
+            update(m).where(m.id == purge.id, m.claim_token == token).values(**values)
+        ).rowcount == 1
+
+    # ---------- purging ----------
+    def batch_select(self, model, column, email):
+        # The keys of the next batch, looked up through the email index
+        key = inspect(model).primary_key[0]
+        return select(key).where(column == email).limit(self.batch_size)
+
+    def _delete_batch(self, model, column, email):
+        key = inspect(model).primary_key[0]
+        keys = self.db.session.execute(self.batch_select(model, column, email)).scalars().all()
+        if keys:
+            self.db.session.execute(delete(model).where(key.in_(keys)))
+        return len(keys)
+
+    def purge_once(self):
+        """Purge one due account completely; False when none is due."""
+        purge, token = self._claim()
+        if purge is None:
+            return False
+        session = self.db.session
+        email = purge.email
+        progress = dict(purge.progress or {})
+        try:
+            for name, model, column in self.tables:
+                while not self._stop.is_set():
+                    deleted = self._delete_batch(model, column, email)
+                    if deleted:
+                        progress[name] = progress.get(name, 0) + deleted
+                    if not self._checkpoint(purge, token, progress=dict(progress)):
+                        session.rollback()
+                        return True
+                    session.commit()
+                    if deleted:
+                        self.rows_deleted += deleted
+                        if self.on_batch is not None:
+                            self.on_batch(name, deleted)
+                    if deleted < self.batch_size:
+                        break
+                    time.sleep(self.pause)   # let other transactions (and replicas) keep up
+            if self._stop.is_set():
+                return True   # the lease expires and the purge resumes elsewhere
+
+            if self._checkpoint(purge, token, status="done", claim_token=None, locked_until=None,
+                                finished_at=datetime.utcnow(), last_error=None):
+                session.commit()
+                self.purges_done += 1
+                if self.on_done is not None:
+                    self.on_done(email)
+        except Exception as e:
+            session.rollback()
+            attempts = (purge.attempts or 0) + 1
+            logger.exception("Purge of %s failed (attempt %d)", email, attempts)
+            delay = min(self.backoff * 2 ** (attempts - 1), 3600)
+            self._checkpoint(purge, token, status="pending", claim_token=None, locked_until=None,
+                             attempts=attempts, last_error=str(e)[:500],
+                             next_attempt_at=datetime.utcnow() + timedelta(seconds=delay))
+            session.commit()
+        return True
+
+    # ---------- reporting ----------
+    def status(self, purge):
+        return {
+            "status": purge.status,
+            "progress": purge.progress or {},
+            "requested_at": purge.requested_at,
+            "finished_at": purge.finished_at,
+        }
+
+    def stats(self):
+        m = self.model
+        counts = dict(self.db.session.execute(select(m.status, func.count()).group_by(m.status)).all())
+        oldest = self.db.session.execute(select(func.min(m.requested_at)).where(m.status != "done")).scalar()
+        return {
+            "by_status": counts,
+            "oldest_waiting_seconds": round((datetime.utcnow() - oldest).total_seconds()) if oldest else 0,
+            "rows_deleted": self.rows_deleted,      # by this process since it started
+            "purges_done": self.purges_done,
+            "running": self._thread is not None and self._pid == os.getpid() and self._thread.is_alive(),
+        }
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsBuffer:
+    """Collects analytics events in memory and writes them in bulk.
+
+    :meth:`record` only appends to a bounded deque. A background thread
+    flushes with one multi-row INSERT when ``batch_size`` events are waiting
+    or every ``flush_interval`` seconds, and once more at interpreter exit.
+    When more than ``max_pending`` events are waiting (e.g. the database is
+    down) new events are dropped and counted instead of growing memory.
+    """
+
+    def __init__(self, app=None, db=None, model=None, batch_size=500, flush_interval=2.0, max_pending=50000):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def init_app(self, app):
+        self.app = app
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                self._events.clear()    # forked child: the parent flushes its own events
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="analytics-buffer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    # ---------- ingestion ----------
+    def record(self, type_, timestamp=None):
+        if self._thread is None or self._pid != os.getpid():
+            self.start()
+        with self._lock:
+            if len(self._events) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._events.append({"type": type_, "timestamp": timestamp or datetime.utcnow()})
+            self.recorded += 1
+            full = len(self._events) >= self.batch_size
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        # Only one flush at a time, so retried events keep their order
+        with self._flush_lock:
+            total = 0
+            while True:
+                with self._lock:
+                    batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                if not batch:
+                    return total
+                try:
+                    with self.app.app_context():
+                        self.db.session.execute(insert(self.model), batch)
+                        self.db.session.commit()
+                except Exception:
+                    logger.exception("Analytics flush failed")
+                    self.failed_flushes += 1
+                    self._requeue(batch)
+                    return total
+                self.flushed += len(batch)
+                total += len(batch)
+
+    def _requeue(self, batch):
+        with self._lock:
+            room = self.max_pending - len(self._events)
+            keep = batch[:max(room, 0)]
+            self.dropped += len(batch) - len(keep)
+            self._events.extendleft(reversed(keep))
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._events)
+        return {
+            "pending": pending,
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
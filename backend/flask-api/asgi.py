@@ -0,0 +1,354 @@
+"""ASGI entry point: I/O-bound routes run as coroutines, the rest through Flask.
+
+    uvicorn asgi:app
+    hypercorn asgi:app
+
+These routes are served on the event loop with an async database driver
+(aiomysql for MySQL, aiosqlite for SQLite) and Gemini's async client, so one
+process can hold many slow requests (bot replies, database waits) open at
+once without a thread each:
+
+    POST /pcos-bot            GET /api/entries         GET /api/cycle
+    GET  /api/recommendations POST /api/feedback       POST /api/send-reset-link
+
+Every other request goes to the Flask app from create_app() through a thread
+pool, so the sync routes keep working unchanged. Only routes of blueprints
+enabled for this deployment (APP_BLUEPRINTS) are served natively.
+
+Needs ``pip install quart a2wsgi aiomysql`` (plus ``aiosqlite`` for SQLite)
+and an ASGI server such as uvicorn or hypercorn.
+"""
+import asyncio
+import os
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from quart import Quart, Response, jsonify, request
+from sqlalchemy import insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.exceptions import HTTPException
+
+from app import create_app
+from commands import ensure_indexes
+from compression import compressible, encode, etag_matches
+from db_pool import engine_options
+from json_provider import json_provider
+import metrics
+from models import EmailOutbox, Feedback, JournalStats, User
+from response_cache import request_variant
+from routes.admin import feedback_email
+from routes.auth import reset_email
+from routes.bot import _sse, bot, conversations
+from routes.cycle import format_cycles, recent_cycles_select
+from routes.journal import entries_page, entries_select, parse_entries_args
+from routes.recommendations import BASE_TIPS, load_journal_stats, recommendations_for
+from services import email_values, hasher, outbox, purger, response_cache
+
+flask_app = create_app()
+aio = Quart(__name__, static_folder=None)
+aio.json = json_provider(aio, flask_app.config['JSON_PROVIDER'])
+engine = None
+read_engine = None  # the replica when DATABASE_REPLICA_URL is set, else engine
+
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.drivername)
+    if driver is None:
+        raise RuntimeError(f"No async driver configured for {url.drivername}")
+    return url.set(drivername=driver)
+
+def in_flask(fn, *args):
+    # Run sync app code (Flask-SQLAlchemy session, current_app) in a Flask app context
+    with flask_app.app_context():
+        return fn(*args)
+
+def create_engine_for(url):
+    # Same DB_* pool settings as the Flask engines
+    return create_async_engine(async_database_url(url), **engine_options(url, is_async=True))
+
+@aio.before_serving
+async def startup():
+    global engine, read_engine
+    # Fork the hashing pool first, before to_thread or the mail and purge
+    # threads below give this process other threads
+    hasher.warm_up()
+    engine = create_engine_for(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    replica_url = flask_app.config.get('DATABASE_REPLICA_URL')
+    read_engine = create_engine_for(replica_url) if replica_url else engine
+    # Async routes may come first, so create tables (and the search index) before serving
+    await asyncio.to_thread(in_flask, ensure_indexes)
+    # Send mail and finish account purges left by a previous run
+    outbox.start()
+    purger.start()
+
+@aio.after_serving
+async def shutdown():
+    # uvicorn re-raises SIGTERM after this, so atexit never stops the pool
+    hasher.shutdown()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+@aio.after_request
+async def cors(response):
+    # Same policy as CORS(app, supports_credentials=True) on the Flask side
+    origin = request.headers.get("Origin")
+    if origin:
+        response.headers["Access-Control-Allow-Origin"] = origin
+        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.headers["Vary"] = "Origin"
+        if request.method == "OPTIONS":
+            response.headers["Access-Control-Allow-Methods"] = request.headers.get(
+                "Access-Control-Request-Method", "GET, POST")
+            response.headers["Access-Control-Allow-Headers"] = request.headers.get(
+                "Access-Control-Request-Headers", "")
+    return response
+
+@aio.after_request
+async def compress(response):
+    # Streamed bodies (NDJSON, SSE) have other mimetypes and are never read here
+    if compressible(response):
+        encode(response, await response.get_data(), request.accept_encodings)
+    return response
+
+#------------------ RESPONSE CACHE --------------------
+async def off_loop(fn, *args):
+    # Lookups in the shared backend are network calls; in-process ones are not worth a thread
+    if response_cache.backend is None:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+def cached(namespace, user_param="email"):
+    """Async counterpart of response_cache.cached: same entries, ETags and invalidation."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper():
+            user = request.args.get(user_param)
+            if not user or not response_cache.enabled:
+                return await view()
+            variant = request_variant(request.args, user_param)
+
+            generation, hit = await off_loop(response_cache.lookup, namespace, user, variant)
+            if hit is not None:
+                etag, body = hit
+                response_cache.record(namespace, "not_modified" if etag_matches(request.if_none_match, etag) else "hit")
+                return response_cache.respond(Response(body, mimetype="application/json"),
+                                              etag, request.if_none_match)
+
+            response_cache.record(namespace, "miss")
+            response = await aio.make_response(await view())
+            if response.status_code != 200 or response.mimetype != "application/json":
+                return response
+            body = await response.get_data()
+            etag = await off_loop(response_cache.store, namespace, user, variant, generation, body)
+            return response_cache.respond(response, etag, request.if_none_match)
+        return wrapper
+    return decorator
+
+#------------------ JOURNAL --------------------
+@cached("entries", user_param="user_id")
+async def get_entries():
+    opts, error = parse_entries_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    fields, limit = opts["fields"], opts["limit"]
+
+    if opts["ndjson"]:
+        async def generate():
+            async with read_engine.connect() as conn:
+                async for row in await conn.stream(entries_select(opts, limit)):
+                    yield aio.json.dumps(dict(zip(fields, row))) + "\n"
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    async with read_engine.connect() as conn:
+        if limit is None:
+            rows = (await conn.execute(entries_select(opts))).all()
+            return jsonify({"entries": [dict(zip(fields, row)) for row in rows]})
+        rows = (await conn.execute(entries_select(opts, limit + 1))).all()
+    return jsonify(entries_page(fields, rows, limit))
+
+#------------------ CYCLE --------------------
+@cached("cycle")
+async def get_cycles():
+    try:
+        email = request.args.get("email")
+        if not email:
+            return jsonify({"error": "Missing email"}), 400
+
+        async with engine.connect() as conn:
+            rows = (await conn.execute(recent_cycles_select(email))).all()
+        return jsonify(format_cycles(rows)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+#------------- RECOMMENDATIONS --------------
+@cached("recommendations")
+async def get_recommendations():
+    email = request.args.get("email")
+    if not email:
+        return jsonify({
+            "overall_mood": "No Data",
+            "recommendations": BASE_TIPS,
+            "last_cycles": ["No data"]
+        })
+
+    async with engine.connect() as conn:
+        stats = (await conn.execute(
+            select(JournalStats.mood_sum, JournalStats.mood_count, JournalStats.last_cycle)
+            .where(JournalStats.user_id == email))).first()
+    if stats is None:
+        # First visit since stats existed: build them once on the sync path
+        return jsonify(await asyncio.to_thread(
+            in_flask, lambda: recommendations_for(load_journal_stats(email))))
+    return jsonify(recommendations_for(stats))
+
+#------------------ MAIL --------------------
+async def submit_feedback():
+    try:
+        data = await request.get_json()
+        email = data.get('email')
+        rating = data.get('rating')
+        comment = data.get('comment', '').strip()
+
+        if not rating or rating == 0:
+            return jsonify({'message': 'Rating is required'}), 400
+
+        row = in_flask(lambda: email_values(**feedback_email(email, rating, comment)))
+        # Feedback and its notification email are saved together
+        async with engine.begin() as conn:
+            await conn.execute(insert(Feedback).values(user_email=email, rating=rating, comment=comment))
+            await conn.execute(insert(EmailOutbox).values(**row))
+        outbox.notify()
+
+        return jsonify({'message': 'Feedback submitted and email sent successfully'}), 200
+
+    except Exception as e:
+        print(f"Error in submit_feedback: {e}")
+        return jsonify({'error': str(e)}), 500
+
+async def send_reset_link():
+    data = await request.get_json()
+    email = data.get('email')
+
+    async with engine.connect() as conn:
+        name = (await conn.execute(select(User.name).where(User.email == email))).scalar()
+    if name is None:
+        return jsonify({'message': 'Email not found'}), 404
+
+    try:
+        row = in_flask(lambda: email_values(**reset_email(name, email)))
+        async with engine.begin() as conn:
+            await conn.execute(insert(EmailOutbox).values(**row))
+        outbox.notify()
+    except Exception as e:
+        print("Email queueing failed:", str(e))
+        return jsonify({'message': 'Failed to send email', 'error': str(e)}), 500
+
+    return jsonify({'message': 'Reset link sent to your email'}), 200
+
+#---------------- BOT -----------------
+async def in_store(fn, *args):
+    # The shared conversation store is a database or network call
+    if conversations.backend is None:
+        return fn(*args)
+    return await asyncio.to_thread(in_flask, fn, *args)
+
+async def pcos_bot():
+    try:
+        data = await request.get_json(silent=True) or {}
+        user_message = data.get("message")
+        if not user_message:
+            return jsonify({"error": "No message provided"}), 400
+
+        conversation_id, history, restarted = await in_store(conversations.open, data.get("conversation_id"))
+
+        # Server-Sent Events: {"stream": true} or Accept: text/event-stream
+        if data.get("stream") or request.accept_mimetypes.best == "text/event-stream":
+            async def generate():
+                replies = []
+                try:
+                    async for text in bot.astream(user_message, history, on_reply=replies.append):
+                        yield _sse("message", {"text": text})
+                    if replies:
+                        await in_store(conversations.add_turn, conversation_id, user_message, replies[0])
+                    yield _sse("done", {"conversation_id": conversation_id, "restarted": restarted})
+                except Exception as e:
+                    yield _sse("error", {"error": str(e)})
+
+            return Response(generate(), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        reply, source = await bot.areply(user_message, history)
+        if source != "fallback":
+            await in_store(conversations.add_turn, conversation_id, user_message, reply)
+        return jsonify({
+            "reply": reply,
+            "cached": source == "cache",
+            "degraded": source == "fallback",
+            "conversation_id": conversation_id,
+            "restarted": restarted
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# (blueprint, rule, method, view): served natively when the blueprint is enabled
+ASYNC_ROUTES = [
+    ("journal", "/api/entries", "GET", get_entries),
+    ("cycle", "/api/cycle", "GET", get_cycles),
+    ("recommendations", "/api/recommendations", "GET", get_recommendations),
+    ("admin", "/api/feedback", "POST", submit_feedback),
+    ("auth", "/api/send-reset-link", "POST", send_reset_link),
+    ("bot", "/pcos-bot", "POST", pcos_bot),
+]
+
+for blueprint, rule, method, view in ASYNC_ROUTES:
+    if blueprint in flask_app.blueprints:
+        # Same endpoint names as the Flask views, e.g. in /metrics
+        aio.add_url_rule(rule, endpoint=f"{blueprint}.{view.__name__}", view_func=view, methods=[method])
+
+_routes = aio.url_map.bind("localhost")
+
+def async_endpoint(path, method):
+    try:
+        return _routes.match(path, method=method)[0]
+    except HTTPException:
+        return None
+
+async def instrumented(endpoint, scope, receive, send):
+    # Timed here rather than in Quart hooks so streamed bodies are included
+    stats = metrics.start_request()
+    status = 500
+
+    async def send_and_record(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        await send(message)
+
+    try:
+        await aio(scope, receive, send_and_record)
+    finally:
+        metrics.finish_request(stats, endpoint, scope["method"], status, scope["path"], flask_app.logger)
+
+# Sync routes run in a thread pool, like a threaded WSGI server
+wsgi = WSGIMiddleware(flask_app, workers=int(os.getenv("ASGI_WSGI_THREADS", "10")))
+
+async def app(scope, receive, send):
+    endpoint = async_endpoint(scope["path"], scope["method"]) if scope["type"] == "http" else None
+    if endpoint:
+        await instrumented(endpoint, scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await aio(scope, receive, send)
+    else:
+        await wsgi(scope, receive, send)
@@ -0,0 +1,511 @@
+"""Latency and throughput of every API route on a seeded database.
+
+Seeds a database at the given scale, then runs each route
+
+  1. through the Flask test client, one request at a time (app cost only), and
+  2. with --http, against a real server started from --server, with
+     --concurrency connections (server, pool and database under load),
+
+and reports req/s and p50/p95/p99 per route. Gemini is the local fake
+(GEMINI_FAKE=1, set GEMINI_FAKE_DELAY to simulate its latency) and mail goes
+to an SMTP sink on 127.0.0.1, so the outbox dispatcher runs for real.
+
+    python benchmarks/api.py --seed --users 500 --years 3
+    python benchmarks/api.py --http --server "uvicorn --port {port} asgi:app" --save api.json
+    python benchmarks/api.py --http --baseline api.json --tolerance 0.25
+
+The database defaults to a SQLite file in the temp directory; use --db for
+MySQL. --seed empties the database first and refuses to touch one holding
+users that are not benchmark users. With --baseline the script exits with
+status 1 when a route's p95 is more than ``tolerance`` slower (and at least
+--min-ms slower) than the baseline.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shlex
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from load_test import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.dirname(HERE)
+
+DEFAULT_DB = "sqlite:///" + os.path.join(tempfile.gettempdir(), "swastha_bench.db")
+DOMAIN = "bench.local"
+PASSWORD = "bench-password"
+ADMIN = {"email": "admin@" + DOMAIN, "password": "bench-admin"}
+MOODS = ["Very Low", "Low", "Sad", "Average", "Happy"]
+WORDS = ("cramps tired yoga walk sleep headache bloating acne energy calm anxious "
+         "water salad workout stress period spotting mood craving doctor").split()
+
+
+def user_email(i):
+    return f"user{i}@{DOMAIN}"
+
+
+#---- MAIL STUB ----
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 bench ESMTP")
+        for line in self.rfile:
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-bench")
+                self.reply("250 AUTH PLAIN")
+            elif command == b"AUTH":
+                self.reply("235 ok")
+            elif command == b"DATA":
+                self.reply("354 go ahead")
+                for data in self.rfile:
+                    if data in (b".\r\n", b".\n"):
+                        break
+                self.server.received += 1
+                self.reply("250 queued")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Accepts (and counts) every message on a free local port."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.received = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def bench_env(db_url, sink):
+    return {
+        "DATABASE_URL": db_url,
+        "GEMINI_FAKE": "1",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(sink.port),
+        "MAIL_USE_TLS": "0",
+        "MAIL_USERNAME": "noreply@" + DOMAIN,
+        "MAIL_PASSWORD": "x",
+        "ADMIN_EMAIL": ADMIN["email"],
+        "ADMIN_PASSWORD": ADMIN["password"],
+    }
+
+
+#---- SEEDING ----
+def _chunks(rows, size=5000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def seed(app, users, years, entries_per_week, visits_per_day):
+    """Fill the database with ``users`` users and ``years`` of history each."""
+    from sqlalchemy import insert, select, text
+
+    from extensions import db
+    from journal_stats import rebuild_all_journal_stats
+    from models import Analytics, CycleEntry, Entry, PcosRiskEntry, User
+    from services import hasher, journal_search
+
+    rng = random.Random(42)
+    today = date.today()
+    start = today - timedelta(days=365 * years)
+
+    with app.app_context():
+        db.create_all()
+        foreign = db.session.execute(
+            select(User.email).where(User.email.notlike(f"%@{DOMAIN}")).limit(1)).first()
+        if foreign:
+            raise SystemExit(f"refusing to seed: {foreign[0]} is not a benchmark user")
+        if db.engine.dialect.name == "sqlite":
+            db.session.execute(text("DROP TABLE IF EXISTS entry_fts"))
+            db.session.commit()
+        db.drop_all()
+        db.create_all()
+
+        # One hash for everyone: seeding should not take users x hashing time
+        pwhash = hasher.hash(PASSWORD)
+        user_rows = [{"name": f"User {i}", "email": user_email(i), "password": pwhash} for i in range(users)]
+
+        entries, cycles, risks = [], [], []
+        entry_gap = 7 / entries_per_week
+        for i in range(users):
+            email = user_email(i)
+            day = start + timedelta(days=rng.random() * entry_gap)
+            while day <= today:
+                entries.append({
+                    "user_id": email, "age": 20 + i % 25, "weight": str(50 + i % 40),
+                    "cycle": str(rng.randint(24, 40)), "date": day.isoformat(),
+                    "mood": rng.choice(MOODS), "entry": " ".join(rng.choices(WORDS, k=rng.randint(8, 60))),
+                })
+                day += timedelta(days=entry_gap)
+            # 28-day predictions, as cycle_forecast gives without history
+            period = start + timedelta(days=rng.randint(0, 27))
+            while period <= today:
+                cycles.append({
+                    "user_email": email, "period_date": period,
+                    "ovulation_date": period + timedelta(days=14),
+                    "fertile_start": period + timedelta(days=10), "fertile_end": period + timedelta(days=15),
+                    "next_period_start": period + timedelta(days=27), "next_period_end": period + timedelta(days=29),
+                    "created_at": datetime.combine(period, datetime.min.time()),
+                })
+                period += timedelta(days=rng.randint(25, 35))
+            for month in range(12 * years):
+                risks.append({"email": email, "risk_score": round(rng.random() * 100, 2),
+                              "created_at": datetime.combine(start + timedelta(days=30 * month), datetime.min.time())})
+
+        visits = []
+        for d in range((today - start).days):
+            day_start = datetime.combine(start + timedelta(days=d), datetime.min.time())
+            for _ in range(visits_per_day):
+                visits.append({"type": "login" if rng.random() < 0.2 else "visit",
+                               "timestamp": day_start + timedelta(seconds=rng.randrange(86400))})
+
+        for model, rows in [(User, user_rows), (Entry, entries), (CycleEntry, cycles),
+                            (PcosRiskEntry, risks), (Analytics, visits)]:
+            for chunk in _chunks(rows):
+                db.session.execute(insert(model), chunk)
+            db.session.commit()
+            print(f"  {model.__tablename__:<14} {len(rows):>9} rows")
+
+        rebuild_all_journal_stats()
+        journal_search.setup()  # builds the search index over the seeded entries
+
+
+def add_spare_users(app, count, run_id):
+    """Accounts for delete-account to remove, new for every run."""
+    from sqlalchemy import insert
+
+    from extensions import db
+    from models import User
+    from services import hasher
+
+    with app.app_context():
+        pwhash = hasher.hash(PASSWORD)
+        for chunk in _chunks([{"name": "Spare", "email": f"spare{run_id}-{i}@{DOMAIN}", "password": pwhash}
+                              for i in range(count)]):
+            db.session.execute(insert(User), chunk)
+        db.session.commit()
+
+
+def add_purge(app, run_id):
+    """A finished account purge for the purge-status route to report; returns its token."""
+    from datetime import datetime
+
+    from extensions import db
+    from models import AccountPurge
+
+    token = f"bench{run_id}"
+    with app.app_context():
+        db.create_all()     # databases seeded before account_purges existed
+        now = datetime.utcnow()
+        db.session.add(AccountPurge(token=token, email=f"purged{run_id}@{DOMAIN}", status="done",
+                                    progress={"journal": 500, "cycles": 20}, requested_at=now, finished_at=now))
+        db.session.commit()
+    return token
+
+
+#---- ROUTES ----
+class Route:
+    def __init__(self, endpoint, method, path, body=None, admin=False, ok=(200, 201), name=None):
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path      # str or fn(n) -> str
+        self.body = body      # None or fn(n) -> dict
+        self.admin = admin
+        self.ok = ok
+        self.name = name or endpoint
+
+    def request(self, n):
+        path = self.path(n) if callable(self.path) else self.path
+        return path, (self.body(n) if self.body else None)
+
+
+def routes(users, run_id, reset_token, purge_token):
+    u = lambda n: user_email(n % users)
+    spare = itertools.count()
+    entry = lambda n: {"user_id": u(n), "age": 25, "weight": "60", "cycle": "29",
+                       "date": date.today().isoformat(), "mood": MOODS[n % 5], "entry": "bench entry yoga"}
+    features = {"cycle_irregularity": 1, "acne": 0, "hair_growth": 1, "hair_loss": 0,
+                "skin_darkening": 0, "weight_gain": 1, "pain": 0}
+    # Reads first, then writes; account deletion last
+    return [
+        Route("auth.check_email", "POST", "/api/check-email", lambda n: {"email": u(n)}),
+        Route("auth.get_profile", "GET", lambda n: f"/api/profile?email={u(n)}"),
+        Route("journal.get_entries", "GET", lambda n: f"/api/entries?user_id={u(n)}"),
+        Route("journal.get_entries", "GET", lambda n: f"/api/entries?user_id={u(n)}&limit=20&fields=id,date,mood",
+              name="journal.get_entries[page]"),
+        Route("journal.get_entries", "GET", lambda n: f"/api/entries?user_id={u(n)}&format=ndjson",
+              name="journal.get_entries[ndjson]"),
+        Route("journal.search_entries", "GET", lambda n: f"/api/entries/search?user_id={u(n)}&q={WORDS[n % len(WORDS)]}"),
+        Route("recommendations.get_recommendations", "GET", lambda n: f"/api/recommendations?email={u(n)}"),
+        Route("cycle.get_cycles", "GET", lambda n: f"/api/cycle?email={u(n)}"),
+        Route("cycle.get_forecast", "GET", lambda n: f"/api/cycle/forecast?email={u(n)}&cycles=6"),
+        Route("auth.export_account", "POST", "/api/export",
+              lambda n: {"email": u(n), "password": PASSWORD, "format": "zip"}, name="auth.export_account[zip]"),
+        Route("auth.export_account", "POST", "/api/export",
+              lambda n: {"email": u(n), "password": PASSWORD, "format": "ndjson"}, name="auth.export_account[ndjson]"),
+        Route("admin.admin_analytics", "GET", "/api/admin-analytics?range=week", admin=True,
+              name="admin.admin_analytics[week]"),
+        Route("admin.admin_analytics", "GET", "/api/admin-analytics?range=year", admin=True,
+              name="admin.admin_analytics[year]"),
+        Route("admin.admin_analytics_buffer", "GET", "/api/admin-analytics/buffer", admin=True),
+        Route("admin.admin_analytics_db", "GET", "/api/admin-analytics/db", admin=True),
+        Route("admin.admin_analytics_purges", "GET", "/api/admin-analytics/purges", admin=True),
+        Route("bot.admin_bot_stats", "GET", "/api/admin-analytics/bot", admin=True),
+        Route("metrics", "GET", "/metrics"),
+        Route("bot.pcos_bot", "POST", "/pcos-bot", lambda n: {"message": "What helps with PCOS?"},
+              name="bot.pcos_bot[cached]"),
+        Route("bot.pcos_bot", "POST", "/pcos-bot", lambda n: {"message": f"bench question {run_id} {n}"}),
+        Route("risk.predict", "POST", "/api/risk-prediction", lambda n: {"email": u(n), "features": features}),
+        Route("risk.predict_batch", "POST", "/api/risk-prediction/batch",
+              lambda n: {"records": [{"email": u(n + i), "features": features} for i in range(100)]}),
+        Route("journal.add_entry", "POST", "/api/entries", entry),
+        Route("cycle.add_cycle", "POST", "/api/cycle",
+              lambda n: {"email": u(n), "period_date": (date.today() - timedelta(days=n % 60)).isoformat()}),
+        Route("admin.submit_feedback", "POST", "/api/feedback", lambda n: {"email": u(n), "rating": 1 + n % 5}),
+        Route("admin.track_visit", "POST", "/api/track-visit"),
+        Route("admin.admin_login", "POST", "/api/admin-login", lambda n: ADMIN),
+        Route("admin.logout", "POST", "/api/logout"),
+        Route("auth.login", "POST", "/api/login", lambda n: {"email": u(n), "password": PASSWORD}),
+        Route("auth.register", "POST", "/api/register",
+              lambda n: {"name": "New", "email": f"new{run_id}-{n}@{DOMAIN}", "password": PASSWORD}),
+        Route("auth.send_reset_link", "POST", "/api/send-reset-link", lambda n: {"email": u(n)}),
+        Route("auth.reset_password", "POST", f"/api/reset-password/{reset_token}", lambda n: {"password": PASSWORD}),
+        Route("auth.delete_account_status", "GET", f"/api/delete-account/{purge_token}"),
+        # 202: the account's rows are purged in the background
+        Route("auth.delete_account", "POST", "/api/delete-account",
+              lambda n: {"email": f"spare{run_id}-{next(spare)}@{DOMAIN}", "password": PASSWORD}, ok=(202,)),
+    ]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+#---- TEST CLIENT ----
+def run_client(app, specs, requests, warmup):
+    results = {}
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["admin"] = True
+    anonymous = app.test_client()
+    offset = 0
+    for spec in specs:
+        client = admin if spec.admin else anonymous
+        latencies, errors = [], 0
+        # Unrecorded first requests load lazy parts (risk model, Gemini client, caches)
+        for n in range(offset, offset + warmup + requests):
+            if n == offset + warmup:
+                start = time.perf_counter()
+            path, body = spec.request(n)
+            t0 = time.perf_counter()
+            response = client.open(path, method=spec.method, json=body)
+            response.get_data()
+            response.close()  # ends the request, like a real server
+            if n >= offset + warmup:
+                latencies.append(time.perf_counter() - t0)
+                errors += response.status_code not in spec.ok
+        results[spec.name] = summarize(latencies, errors, time.perf_counter() - start)
+        offset += warmup + requests
+    return results
+
+
+#---- HTTP ----
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(command, env):
+    port = free_port()
+    proc = subprocess.Popen(shlex.split(command.format(port=port)), cwd=API_DIR,
+                            env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"server exited: {proc.stderr.read().decode()[-2000:]}")
+        try:
+            if httpx.get(url + "/metrics", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("server did not start within 60s")
+
+
+async def run_http_route(client, spec, concurrency, requests, offset):
+    latencies, errors = [], 0
+    counter = iter(range(offset, offset + requests))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            path, body = spec.request(n)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(spec.method, path, json=body)
+                errors += response.status_code not in spec.ok
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_http(url, specs, concurrency, requests, warmup, offset):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as anonymous, \
+            httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as admin:
+        await admin.post("/api/admin-login", json=ADMIN)
+        results = {}
+        for spec in specs:
+            client = admin if spec.admin else anonymous
+            # Every worker process loads its lazy parts on its own first requests
+            await run_http_route(client, spec, concurrency, warmup * concurrency, offset)
+            offset += warmup * concurrency
+            results[spec.name] = await run_http_route(client, spec, concurrency, requests, offset)
+            offset += requests
+        return results
+
+
+#---- REPORT ----
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'route':<38} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"  {name:<38} {r['rps']:>8.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+def regressions(result, baseline, tolerance, min_ms):
+    slower = []
+    for mode in ("client", "http"):
+        for name, r in (result.get(mode) or {}).items():
+            before = (baseline.get(mode) or {}).get(name)
+            if before and r["p95_ms"] - before["p95_ms"] > min_ms and r["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                slower.append(f"{mode} {name}: p95 {r['p95_ms']:.1f} ms vs {before['p95_ms']:.1f} ms baseline")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLAlchemy URL of the benchmark database")
+    parser.add_argument("--seed", action="store_true", help="(re)create and fill the database first")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--entries-per-week", type=float, default=3)
+    parser.add_argument("--visits-per-day", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50, help="test-client requests per route")
+    parser.add_argument("--warmup", type=int, default=3, help="unrecorded requests per route (per connection over HTTP)")
+    parser.add_argument("--routes", help="comma-separated route names to run (default: all)")
+    parser.add_argument("--http", action="store_true", help="also load-test a real server")
+    parser.add_argument("--server", default="gunicorn -w 2 --threads 8 -b 127.0.0.1:{port} wsgi:app")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--http-requests", type=int, default=200, help="HTTP requests per route")
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare against saved results")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    sink = SMTPSink()
+    env = bench_env(args.db, sink)
+    os.environ.update(env)
+    os.environ.setdefault("GEMINI_FAKE_DELAY", "0")
+    sys.path.insert(0, API_DIR)
+    from app import create_app
+    from routes.auth import _serializer
+
+    app = create_app()
+    if args.seed:
+        print(f"Seeding {args.db}")
+        seed(app, args.users, args.years, args.entries_per_week, args.visits_per_day)
+
+    run_id = int(time.time())
+    with app.test_request_context():
+        reset_token = _serializer().dumps(user_email(0), salt="password-reset-salt")
+    purge_token = add_purge(app, run_id) if "auth.delete_account_status" in app.view_functions else ""
+    specs = [s for s in routes(args.users, run_id, reset_token, purge_token) if s.endpoint in app.view_functions]
+    if args.routes:
+        wanted = set(args.routes.split(","))
+        specs = [s for s in specs if s.name in wanted or s.endpoint in wanted]
+    if any(s.endpoint == "auth.delete_account" for s in specs):
+        spares = args.warmup + args.requests
+        if args.http:
+            spares += args.warmup * args.concurrency + args.http_requests
+        add_spare_users(app, spares, run_id)
+
+    result = {
+        "python": sys.version.split()[0],
+        "db": args.db.split("://")[0],
+        "scale": {"users": args.users, "years": args.years, "entries_per_week": args.entries_per_week,
+                  "visits_per_day": args.visits_per_day},
+        "client": run_client(app, specs, args.requests, args.warmup),
+    }
+    print_table(f"Flask test client ({args.requests} sequential requests per route)", result["client"])
+
+    if args.http:
+        proc, url = start_server(args.server, env)
+        try:
+            # Request numbers continue after the client run, so unique emails stay unique
+            result["http"] = asyncio.run(run_http(url, specs, args.concurrency, args.http_requests,
+                                                  args.warmup, (args.warmup + args.requests) * len(specs)))
+        finally:
+            proc.terminate()
+            proc.wait()
+        result["server"] = args.server
+        result["concurrency"] = args.concurrency
+        print_table(f"HTTP: {args.server} (c={args.concurrency}, {args.http_requests} requests per route)",
+                    result["http"])
+
+    time.sleep(1)  # let the outbox finish what was queued
+    result["mail_delivered"] = sink.received
+    print(f"\nMail delivered to the local sink: {sink.received}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(result, baseline, args.tolerance, args.min_ms)
+        for line in slower:
+            print("REGRESSION", line)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Concurrent-connection load test against a running server.
+
+Sends ``--requests`` requests at each concurrency level and reports
+throughput and latency, e.g. to compare the WSGI and ASGI modes with the
+same number of processes and a slow (fake) Gemini:
+
+    GEMINI_FAKE=1 GEMINI_FAKE_DELAY=0.5 BOT_MAX_IN_FLIGHT=1000 \\
+        gunicorn -w 1 --threads 8 -b 127.0.0.1:5000 wsgi:app
+    GEMINI_FAKE=1 GEMINI_FAKE_DELAY=0.5 BOT_MAX_IN_FLIGHT=1000 \\
+        uvicorn --port 5001 asgi:app
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --save wsgi.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5001 --save asgi.json
+
+``{n}`` in ``--json`` is replaced by the request number, so bot questions
+miss the reply cache by default.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)
+    return values[k]
+
+
+async def run_level(client, method, url, body, concurrency, total, first=0):
+    latencies = []
+    errors = Counter()
+    counter = iter(range(first, first + total))
+
+    async def worker():
+        for n in counter:
+            kwargs = {}
+            if body is not None:
+                kwargs["content"] = body.replace("{n}", str(n))
+                kwargs["headers"] = {"Content-Type": "application/json"}
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    errors[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": dict(errors),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def main_async(args):
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    results = []
+    sent = 0
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        for level in levels:
+            total = max(args.requests, level)
+            # Numbering continues across levels so {n} never repeats
+            result = await run_level(client, args.method, args.path, args.json, level, total, sent)
+            sent += total
+            results.append(result)
+            print(f"c={level:<5} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:8.1f} ms  "
+                  f"p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  errors {sum(result['errors'].values())} {result['errors'] or ''}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--path", default="/pcos-bot")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--json", default='{"message": "load test question {n}"}',
+                        help="request body; empty for none")
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--requests", type=int, default=256, help="requests per level")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--save", help="write the results as JSON")
+    args = parser.parse_args()
+    args.json = args.json or None
+
+    results = asyncio.run(main_async(args))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"url": args.url, "path": args.path, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Serialization CPU and response bytes of every JSON read route.
+
+Runs each GET route of benchmarks/api.py once on the seeded benchmark
+database and keeps the object it hands to jsonify. Then, for that payload,
+it times
+
+  * Flask's default provider (stdlib json, ASCII-escaped, the old output),
+  * the stdlib and orjson providers from json_provider, and
+  * gzip and Brotli (when installed) at the levels compression.py uses,
+
+and reports the size of each body, so the bytes saved per route are
+visible next to the CPU they cost.
+
+    python benchmarks/api.py --seed --users 500 --years 3
+    python benchmarks/serialization.py --save serialization.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from api import ADMIN, API_DIR, DEFAULT_DB, SMTPSink, add_purge, bench_env, routes
+
+
+def per_call_us(fn, min_seconds):
+    # Repeat until min_seconds have passed; microseconds per call
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return round(elapsed / calls * 1e6, 1)
+
+
+def capture_payloads(app, specs):
+    """Run each route once and return {route name: object passed to jsonify}."""
+    payloads = {}
+    admin = app.test_client()
+    admin.post("/api/admin-login", json=ADMIN)
+    anonymous = app.test_client()
+
+    provider = app.json
+    respond = provider.response
+
+    def recording(*args, **kwargs):
+        payloads[current] = provider._prepare_response_obj(args, kwargs)
+        return respond(*args, **kwargs)
+
+    provider.response = recording
+    try:
+        for spec in specs:
+            current = spec.name
+            path, _ = spec.request(0)
+            response = (admin if spec.admin else anonymous).get(path)
+            response.close()
+            if response.status_code != 200:
+                payloads.pop(current, None)
+    finally:
+        provider.response = respond
+    return payloads
+
+
+def measure(app, payload, min_seconds):
+    from flask.json.provider import DefaultJSONProvider
+
+    import compression
+    from json_provider import IsoJSONProvider, OrjsonProvider, orjson
+
+    flask, stdlib = DefaultJSONProvider(app), IsoJSONProvider(app)
+    encoders = {
+        # What jsonify sent before json_provider
+        "flask": lambda: f"{flask.dumps(payload, separators=(',', ':'))}\n".encode(),
+        "stdlib": lambda: stdlib._response_body(payload).encode(),
+    }
+    if orjson is not None:
+        fast = OrjsonProvider(app)
+        encoders["orjson"] = lambda: fast._response_body(payload)
+
+    result = {"bytes": {}, "us": {}}
+    for name, encode in encoders.items():
+        result["bytes"][name] = len(encode())
+        result["us"][name] = per_call_us(encode, min_seconds)
+
+    body = encoders["stdlib"]()
+    for coding in compression.CODINGS:
+        result["bytes"][coding] = len(compression.compress(body, coding))
+        result["us"][coding] = per_call_us(lambda: compression.compress(body, coding), min_seconds)
+    return result
+
+
+def print_table(results, codings):
+    columns = ["flask", "stdlib", "orjson", *codings]
+    print(f"\n  {'route':<38}" + "".join(f"{c + ' B':>10}" for c in columns)
+          + "".join(f"{c + ' us':>11}" for c in columns))
+    for name, r in results.items():
+        print(f"  {name:<38}" + "".join(f"{r['bytes'].get(c, 0):>10}" for c in columns)
+              + "".join(f"{r['us'].get(c, 0):>11.1f}" for c in columns))
+
+    totals = {c: sum(r["bytes"].get(c, 0) for r in results.values()) for c in columns}
+    if totals["flask"]:
+        saved = ", ".join(f"{c} {100 - totals[c] * 100 / totals['flask']:.0f}%" for c in columns[1:] if totals[c])
+        print(f"\n  bytes saved against Flask's default output: {saved}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLAlchemy URL of the (seeded) benchmark database")
+    parser.add_argument("--users", type=int, default=200, help="users seeded by benchmarks/api.py")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="timing per payload and encoder")
+    parser.add_argument("--save", help="write the results as JSON")
+    args = parser.parse_args()
+
+    sink = SMTPSink()
+    os.environ.update(bench_env(args.db, sink))
+    os.environ["RESPONSE_CACHE_MB"] = "0"   # every route runs its view
+    sys.path.insert(0, API_DIR)
+    import compression
+    from app import create_app
+
+    app = create_app()
+    run_id = int(time.time())
+    specs = [s for s in routes(args.users, run_id, "", add_purge(app, run_id))
+             if s.method == "GET" and s.endpoint in app.view_functions]
+    payloads = capture_payloads(app, specs)
+
+    results = {}
+    with app.app_context():
+        for name, payload in payloads.items():
+            results[name] = measure(app, payload, args.min_seconds)
+    print_table(results, compression.CODINGS)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Startup-time benchmark for the Flask API.
+
+Imports ``app`` and calls ``create_app()`` in a fresh interpreter under
+``python -X importtime`` and reports the import cost per subsystem, plus the
+cost of the lazy loads (risk model, Gemini client) when ``--warm`` is given.
+Set APP_BLUEPRINTS to measure the startup of one worker pool.
+
+    python benchmarks/startup.py                       # print a report
+    python benchmarks/startup.py --save startup.json   # keep it as a baseline
+    python benchmarks/startup.py --baseline startup.json --tolerance 0.25
+
+With ``--baseline`` the script exits with status 1 when the total import time
+or any subsystem is more than ``tolerance`` slower (and at least ``--min-ms``
+slower) than the baseline, so it can run in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.dirname(HERE)
+
+# Top-level module -> subsystem it is reported under
+SUBSYSTEMS = {
+    "flask": "flask", "werkzeug": "flask", "jinja2": "flask", "itsdangerous": "flask",
+    "flask_cors": "flask", "click": "flask",
+    "sqlalchemy": "database", "flask_sqlalchemy": "database", "pymysql": "database",
+    "numpy": "numpy", "pandas": "pandas", "sklearn": "scikit-learn", "scipy": "scikit-learn",
+    "joblib": "scikit-learn",
+    "google": "gemini", "httpx": "gemini", "pydantic": "gemini",
+    "dateutil": "dateutil", "dotenv": "dotenv",
+    "risk_engine": "app", "mail_outbox": "app", "analytics_buffer": "app", "hashing": "app",
+    "journal_search": "app", "bot_service": "app", "app": "app", "config": "app",
+    "extensions": "app", "models": "app", "services": "app", "journal_stats": "app",
+    "commands": "app", "routes": "app",
+}
+
+PROBE = """
+import time
+start = time.perf_counter()
+from app import create_app, warm_up
+application = create_app()
+imported = time.perf_counter()
+if {warm}:
+    warm_up(application)
+print("STARTUP", imported - start, time.perf_counter() - imported)
+"""
+
+
+def parse_importtime(stderr):
+    """Sum the self time (microseconds) of every imported module per subsystem."""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self |   cumulative | name"; self times add up
+        # without double counting nested imports
+        self_us, _, name = line[len("import time:"):].split("|")
+        group = SUBSYSTEMS.get(name.strip().split(".")[0], "other")
+        totals[group] = totals.get(group, 0) + int(self_us)
+    return totals
+
+
+def run_once(warm, env):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(warm=warm)],
+        cwd=API_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-2000:])
+        raise SystemExit(f"importing app failed (exit {proc.returncode})")
+    line = next(l for l in proc.stdout.splitlines() if l.startswith("STARTUP"))
+    _, imported, warmed = line.split()
+    return {
+        "import_ms": float(imported) * 1000,
+        "warm_up_ms": float(warmed) * 1000,
+        "subsystems_ms": {k: v / 1000 for k, v in parse_importtime(proc.stderr).items()},
+    }
+
+
+def measure(runs, warm):
+    env = dict(os.environ)
+    # Keep the probe offline: fake Gemini client, no API key needed
+    env.setdefault("GEMINI_FAKE", "1")
+    env.pop("WARM_UP", None)
+    samples = [run_once(warm, env) for _ in range(runs)]
+    groups = sorted({g for s in samples for g in s["subsystems_ms"]})
+    return {
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "warm_up_ms": round(statistics.median(s["warm_up_ms"] for s in samples), 1) if warm else None,
+        "subsystems_ms": {
+            g: round(statistics.median(s["subsystems_ms"].get(g, 0.0) for s in samples), 1)
+            for g in groups
+        },
+    }
+
+
+def regressions(result, baseline, tolerance, min_ms):
+    checks = [("import", result["import_ms"], baseline["import_ms"])]
+    for group, ms in result["subsystems_ms"].items():
+        checks.append((group, ms, baseline["subsystems_ms"].get(group, 0.0)))
+    return [
+        f"{name}: {now:.1f} ms vs {before:.1f} ms baseline"
+        for name, now, before in checks
+        if now - before > min_ms and now > before * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm", action="store_true", help="also time warm_up()")
+    parser.add_argument("--save", help="write the result as JSON")
+    parser.add_argument("--baseline", help="compare against a saved result")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    result = measure(args.runs, args.warm)
+    print(f"create_app(): {result['import_ms']:.1f} ms (median of {args.runs})")
+    if args.warm:
+        print(f"warm_up():    {result['warm_up_ms']:.1f} ms")
+    for group, ms in sorted(result["subsystems_ms"].items(), key=lambda kv: -kv[1]):
+        print(f"  {group:<14} {ms:8.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(result, baseline, args.tolerance, args.min_ms)
+        for line in slower:
+            print("REGRESSION", line)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,722 @@
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant that provides support and guidance on:\n"
+    "- PCOS\n"
+    "- PCOD\n"
+    "- Women's health (including general health and self-care)\n"
+    "- Emotional support\n"
+    "- Fertility\n"
+    "- Diet & healthy recipes\n"
+    "- Exercises & fitness\n"
+    "- Greetings (like hi, hello)\n"
+    "- Lifestyle management for women\n\n"
+    "Instructions:\n"
+    "1. If the user expresses emotions (e.g., sad, upset, angry, tired, stressed, sorry, thank), "
+    "reply empathetically with supportive messages.\n"
+    "2. If the user makes grammar or spelling mistakes, always interpret their intent and still "
+    "provide a meaningful answer without pointing out mistakes unless helpful.\n"
+    "3. If the query is not related to any of the above topics, strictly reply:\n"
+    "   'Sorry, I can’t provide information on that. I’m here to offer guidance, tips, and support "
+    "related to PCOS, women’s health, and overall wellness.'\n\n"
+    "Formatting rules:\n"
+    "- Use **Markdown**\n"
+    "- Bullet points (*)\n"
+    "- Numbered lists (1.)\n"
+    "- **Bold** for key terms\n"
+    "- Line breaks for readability\n\n"
+    "Keep answers clear, structured, empathetic, and easy to read."
+)
+
+
+def normalize_question(text):
+    # "What is PCOS?" and "what is  pcos" share a cache entry
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.rstrip("?!. ")
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def clip(text, tokens):
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+class ResponseCache:
+    """Thread-safe LRU of bot replies with a per-entry TTL."""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, allow_stale=False):
+        # Expired replies stay until evicted, as a fallback when Gemini is down
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (allow_stale or item[1] > time.monotonic()):
+                self._data.move_to_end(key)
+                if not allow_stale:
+                    self.hits += 1
+                return item[0]
+            if not allow_stale:
+                self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+FALLBACK_REPLY = (
+    "I’m having trouble answering right now 💚 Please try again in a little while. "
+    "Meanwhile, you can explore your **Recommendations** and **Journal** pages."
+)
+
+
+class BotUnavailable(Exception):
+    """The bot can't take this call (breaker open or no free slot)."""
+
+
+class LatencyStat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed or slow calls.
+
+    While open, calls are refused for ``reset_timeout`` seconds; then a single
+    trial call is let through (half-open) and its outcome closes or re-opens
+    the breaker.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._changed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # open: wait out reset_timeout; half-open: a stuck trial also times out
+            if time.monotonic() - self._changed_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._changed_at = time.monotonic()
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self.state = "closed"
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._changed_at = time.monotonic()
+
+
+class BotService:
+    """Answers bot questions through a Gemini-style client, with a reply cache.
+
+    ``client`` only needs ``client.models.generate_content`` and
+    ``client.models.generate_content_stream``, so :class:`FakeGeminiClient`
+    can stand in for Gemini in development and benchmarks.
+
+    Upstream calls are isolated so a slow Gemini can't take the API down:
+    at most ``max_in_flight`` calls run at once (others wait up to
+    ``queue_timeout``), each has a ``timeout`` deadline, and a circuit
+    breaker stops calling after repeated errors or calls slower than
+    ``slow_call``. Refused or failed calls get a stale cached reply for the
+    same question, or :data:`FALLBACK_REPLY`. ``on_upstream(seconds, ok)``
+    is called after every Gemini call, e.g. to feed a latency histogram.
+    """
+
+    def __init__(self, client, model_name, cache=None, max_in_flight=4, queue_timeout=2.0,
+                 timeout=20.0, slow_call=15.0, breaker=None, on_upstream=None):
+        self.client = client
+        self.model_name = model_name
+        self.cache = cache or ResponseCache()
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.slow_call = slow_call
+        self.breaker = breaker or CircuitBreaker()
+        self.on_upstream = on_upstream
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._metrics_lock = threading.Lock()
+        self.queue_wait = LatencyStat()
+        self.upstream_latency = LatencyStat()
+        self.in_flight = 0
+        self.rejected = 0
+        self.failures = 0
+        self.fallbacks = 0
+
+    # ---------- isolation ----------
+    def _config(self):
+        return {"http_options": {"timeout": int(self.timeout * 1000)}}
+
+    def _admit(self):
+        if not self.breaker.allow():
+            with self._metrics_lock:
+                self.rejected += 1
+            raise BotUnavailable("circuit open")
+
+    def _acquire(self):
+        self._admit()
+        start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        self._waited(start, acquired)
+
+    async def _aacquire(self):
+        # Same slots as the threaded path, polled so the event loop never blocks
+        self._admit()
+        start = time.monotonic()
+        acquired = self._slots.acquire(blocking=False)
+        while not acquired and time.monotonic() - start < self.queue_timeout:
+            await asyncio.sleep(0.01)
+            acquired = self._slots.acquire(blocking=False)
+        self._waited(start, acquired)
+
+    def _waited(self, start, acquired):
+        with self._metrics_lock:
+            self.queue_wait.observe(time.monotonic() - start)
+            if not acquired:
+                self.rejected += 1
+            else:
+                self.in_flight += 1
+        if not acquired:
+            raise BotUnavailable("too many bot calls in flight")
+
+    def _release(self, started, ok):
+        elapsed = time.monotonic() - started
+        self._slots.release()
+        with self._metrics_lock:
+            self.in_flight -= 1
+            self.upstream_latency.observe(elapsed)
+            if not ok:
+                self.failures += 1
+        self.breaker.record(ok and elapsed <= self.slow_call)
+        if self.on_upstream is not None:
+            self.on_upstream(elapsed, ok)
+
+    def _fallback(self, key, error):
+        logger.warning("Bot fallback: %s", error)
+        with self._metrics_lock:
+            self.fallbacks += 1
+        return self.cache.get(key, allow_stale=True) or FALLBACK_REPLY
+
+    def stats(self):
+        with self._metrics_lock:
+            upstream = {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queue_wait": self.queue_wait.as_dict(),
+                "latency": self.upstream_latency.as_dict(),
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "fallbacks": self.fallbacks,
+            }
+        upstream["breaker"] = {"state": self.breaker.state, "opened": self.breaker.opened}
+        return {"cache": self.cache.stats(), "upstream": upstream}
+
+    def _prompt(self, message, history=None):
+        parts = [SYSTEM_PROMPT]
+        if history:
+            summary, turns = history
+            if summary:
+                parts.append("Earlier in this conversation the user asked about:\n" + "\n".join(summary))
+            for question, answer in turns:
+                parts.append(f"User: {question}\nAssistant: {answer}")
+        parts.append(f"User: {message}")
+        return "\n\n".join(parts)
+
+    def _key(self, message):
+        return (self.model_name, normalize_question(message))
+
+    def reply(self, message, history=None):
+        """Return (reply text, source) where source is cache, upstream or fallback.
+
+        ``history`` comes from :meth:`ConversationStore.open`. Follow-up
+        questions depend on it, so only first questions use the reply cache.
+        """
+        key = self._key(message)
+        cached = None if history else self.cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+        try:
+            self._acquire()
+        except BotUnavailable as e:
+            return self._fallback(key, e), "fallback"
+
+        started, ok = time.monotonic(), False
+        try:
+            response = self.client.models.generate_content(
+                model=self.model_name,
+                contents=self._prompt(message, history),
+                config=self._config()
+            )
+            reply = response.text if hasattr(response, "text") else str(response)
+            ok = True
+        except Exception as e:
+            return self._fallback(key, e), "fallback"
+        finally:
+            self._release(started, ok)
+
+        if reply and not history:
+            self.cache.set(key, reply)
+        return reply, "upstream"
+
+    def stream(self, message, history=None, on_reply=None):
+        """Yield reply text chunks as they arrive; a cache hit or fallback is one chunk.
+
+        ``on_reply`` is called with the full text of a complete real answer
+        (not a fallback), e.g. to add it to the conversation.
+        """
+        key = self._key(message)
+        cached = None if history else self.cache.get(key)
+        if cached is not None:
+            yield cached
+            if on_reply:
+                on_reply(cached)
+            return
+        try:
+            self._acquire()
+        except BotUnavailable as e:
+            yield self._fallback(key, e)
+            return
+
+        started, ok = time.monotonic(), False
+        parts = []
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model_name,
+                contents=self._prompt(message, history),
+                config=self._config()
+            ):
+                text = getattr(chunk, "text", None)
+                if text:
+                    parts.append(text)
+                    yield text
+            ok = True
+        except GeneratorExit:
+            ok = True   # client went away, not an upstream failure
+            raise
+        except Exception as e:
+            if not parts:
+                yield self._fallback(key, e)
+                return
+            raise
+        finally:
+            self._release(started, ok)
+        if not parts:
+            return
+        reply = "".join(parts)
+        # Only complete answers to first questions are cached
+        if not history:
+            self.cache.set(key, reply)
+        if on_reply:
+            on_reply(reply)
+
+    # ---------- asyncio (ASGI serving) ----------
+    async def areply(self, message, history=None):
+        """Coroutine version of :meth:`reply`, using ``client.aio``."""
+        key = self._key(message)
+        cached = None if history else self.cache.get(key)
+        if cached is not None:
+            return cached, "cache"
+        try:
+            await self._aacquire()
+        except BotUnavailable as e:
+            return self._fallback(key, e), "fallback"
+
+        started, ok = time.monotonic(), False
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=self._prompt(message, history),
+                config=self._config()
+            )
+            reply = response.text if hasattr(response, "text") else str(response)
+            ok = True
+        except asyncio.CancelledError:
+            ok = True   # client went away, not an upstream failure
+            raise
+        except Exception as e:
+            return self._fallback(key, e), "fallback"
+        finally:
+            self._release(started, ok)
+
+        if reply and not history:
+            self.cache.set(key, reply)
+        return reply, "upstream"
+
+    async def astream(self, message, history=None, on_reply=None):
+        """Async generator version of :meth:`stream`."""
+        key = self._key(message)
+        cached = None if history else self.cache.get(key)
+        if cached is not None:
+            yield cached
+            if on_reply:
+                on_reply(cached)
+            return
+        try:
+            await self._aacquire()
+        except BotUnavailable as e:
+            yield self._fallback(key, e)
+            return
+
+        started, ok = time.monotonic(), False
+        parts = []
+        try:
+            async for chunk in await self.client.aio.models.generate_content_stream(
+                model=self.model_name,
+                contents=self._prompt(message, history),
+                config=self._config()
+            ):
+                text = getattr(chunk, "text", None)
+                if text:
+                    parts.append(text)
+                    yield text
+            ok = True
+        except (GeneratorExit, asyncio.CancelledError):
+            ok = True
+            raise
+        except Exception as e:
+            if not parts:
+                yield self._fallback(key, e)
+                return
+            raise
+        finally:
+            self._release(started, ok)
+        if not parts:
+            return
+        reply = "".join(parts)
+        if not history:
+            self.cache.set(key, reply)
+        if on_reply:
+            on_reply(reply)
+
+
+class Conversation:
+    __slots__ = ("turns", "summary", "tokens", "expires")
+
+    def __init__(self, turns=(), summary=(), tokens=0):
+        self.turns = deque(tuple(t) for t in turns)   # (question, answer), oldest first
+        self.summary = deque(summary)   # one line per turn folded out of ``turns``
+        self.tokens = tokens
+        self.expires = 0.0
+
+    def dumps(self):
+        return json.dumps({"turns": list(self.turns), "summary": list(self.summary),
+                           "tokens": self.tokens}).encode()
+
+    @classmethod
+    def loads(cls, data):
+        return cls(**json.loads(data))
+
+
+class SqlBackend:
+    """``get`` / ``set`` with a TTL over a table of (id, data, expires_at),
+    the interface of response_cache.RedisBackend; needs an app context."""
+
+    def __init__(self, db, model, purge_every=100):
+        self.db = db
+        self.model = model
+        self.purge_every = purge_every
+        self._writes = 0
+
+    def get(self, key):
+        row = self.db.session.get(self.model, key)
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return row.data.encode()
+
+    def set(self, key, value, ttl):
+        now = datetime.utcnow()
+        self.db.session.merge(self.model(id=key, data=value.decode(), expires_at=now + timedelta(seconds=ttl)))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            # Expired rows are never read again; drop them now and then
+            self.db.session.query(self.model).filter(self.model.expires_at <= now).delete()
+        self.db.session.commit()
+
+
+class ConversationStore:
+    """Server-side bot conversations with a bounded history.
+
+    Each conversation keeps its recent turns verbatim (every question and
+    answer clipped to ``turn_tokens``) while they fit in ``history_tokens``.
+    Older turns are folded into a short summary of what the user asked,
+    itself capped at ``summary_tokens``, so the prompt stays the same size
+    however long the chat runs. Conversations idle for ``ttl`` seconds are
+    dropped.
+
+    With a ``backend`` (``get(key)`` / ``set(key, value, ttl)``, such as
+    :class:`SqlBackend` or response_cache.RedisBackend) every worker sees
+    every conversation. Without one they live in this process only, at most
+    ``max_sessions`` of them, least recently used first out, and follow-ups
+    must be routed to the same process (sticky sessions).
+    """
+
+    def __init__(self, max_sessions=1000, ttl=1800, history_tokens=1500,
+                 summary_tokens=300, turn_tokens=400, backend=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.turn_tokens = turn_tokens
+        self.backend = backend
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.restarted = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _purge(self, now):
+        # Ordered by last use, so idle conversations are at the front
+        while self._data:
+            key, conv = next(iter(self._data.items()))
+            if conv.expires > now:
+                return
+            del self._data[key]
+            self.expired += 1
+
+    def open(self, conversation_id=None):
+        """Return (conversation_id, history, restarted).
+
+        ``history`` is (summary lines, turns) or None for a fresh conversation.
+        Unknown or expired ids start a new one, with ``restarted`` True so the
+        client can tell the earlier context is gone.
+        """
+        if self.backend is not None:
+            data = self.backend.get(self._key(conversation_id)) if conversation_id else None
+            if data is None:
+                self.started += 1
+                self.restarted += bool(conversation_id)
+                return uuid.uuid4().hex, None, bool(conversation_id)
+            conv = Conversation.loads(data)
+            history = (list(conv.summary), list(conv.turns)) if conv.turns or conv.summary else None
+            return conversation_id, history, False
+
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            conv = self._data.get(conversation_id) if conversation_id else None
+            restarted = conv is None and bool(conversation_id)
+            self.restarted += restarted
+            if conv is None:
+                conversation_id = uuid.uuid4().hex
+                conv = self._data[conversation_id] = Conversation()
+                self.started += 1
+                while len(self._data) > self.max_sessions:
+                    self._data.popitem(last=False)
+                    self.evicted += 1
+            self._data.move_to_end(conversation_id)
+            conv.expires = now + self.ttl
+            if not conv.turns and not conv.summary:
+                return conversation_id, None, restarted
+            return conversation_id, (list(conv.summary), list(conv.turns)), restarted
+
+    def _key(self, conversation_id):
+        return f"bot:{conversation_id}"
+
+    def add_turn(self, conversation_id, question, answer):
+        question = clip(question, self.turn_tokens)
+        answer = clip(answer, self.turn_tokens)
+        if self.backend is not None:
+            # Conversations are saved from their first turn; the TTL restarts on every turn
+            data = self.backend.get(self._key(conversation_id))
+            conv = Conversation.loads(data) if data is not None else Conversation()
+            self._fold(conv, question, answer)
+            self.backend.set(self._key(conversation_id), conv.dumps(), self.ttl)
+            return
+        with self._lock:
+            conv = self._data.get(conversation_id)
+            if conv is None:
+                return      # expired or evicted mid-reply
+            self._fold(conv, question, answer)
+
+    def _fold(self, conv, question, answer):
+        conv.turns.append((question, answer))
+        conv.tokens += estimate_tokens(question) + estimate_tokens(answer)
+        # Keep the latest turn even if it alone is over budget
+        while conv.tokens > self.history_tokens and len(conv.turns) > 1:
+            old_q, old_a = conv.turns.popleft()
+            conv.tokens -= estimate_tokens(old_q) + estimate_tokens(old_a)
+            conv.summary.append("- " + clip(" ".join(old_q.split()), 40))
+        while (len(conv.summary) > 1
+               and sum(estimate_tokens(line) for line in conv.summary) > self.summary_tokens):
+            conv.summary.popleft()
+
+    def stats(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return {
+                "store": "memory" if self.backend is None else type(self.backend).__name__,
+                "active": len(self._data) if self.backend is None else None,   # by this process
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "history_tokens": self.history_tokens,
+                "started": self.started,
+                "restarted": self.restarted,    # follow-ups whose id was unknown
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+class LazyClient:
+    """Builds the real client with ``factory()`` the first time it is used.
+
+    Constructing ``genai.Client`` imports most of the google-genai SDK, so
+    workers that never serve the bot never pay for it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def models(self):
+        return self.get().models
+
+    @property
+    def aio(self):
+        return self.get().aio
+
+
+class FakeGeminiClient:
+    """Local stand-in for ``genai.Client`` (set GEMINI_FAKE=1)."""
+
+    def __init__(self, reply="This is a sample answer about **PCOS** care.", delay=0.0, chunks=4):
+        self.models = SimpleNamespace(
+            generate_content=self.generate_content,
+            generate_content_stream=self.generate_content_stream
+        )
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self.agenerate_content,
+            generate_content_stream=self.agenerate_content_stream
+        ))
+        self.reply = reply
+        self.delay = delay
+        self.chunks = chunks
+        self.calls = 0
+
+    def _deadline(self, seconds, config):
+        # Honour the per-call deadline like the real client's HTTP timeout
+        timeout = ((config or {}).get("http_options") or {}).get("timeout")
+        if timeout is not None and seconds > timeout / 1000:
+            return timeout / 1000
+        return None
+
+    def _wait(self, seconds, config):
+        deadline = self._deadline(seconds, config)
+        time.sleep(seconds if deadline is None else deadline)
+        if deadline is not None:
+            raise TimeoutError("fake Gemini call timed out")
+
+    async def _await(self, seconds, config):
+        deadline = self._deadline(seconds, config)
+        await asyncio.sleep(seconds if deadline is None else deadline)
+        if deadline is not None:
+            raise TimeoutError("fake Gemini call timed out")
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        self._wait(self.delay, config)
+        return SimpleNamespace(text=self.reply)
+
+    def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        size = max(len(self.reply) // self.chunks, 1)
+        for i in range(0, len(self.reply), size):
+            self._wait(self.delay / self.chunks, config)
+            yield SimpleNamespace(text=self.reply[i:i + size])
+
+    async def agenerate_content(self, model, contents, config=None):
+        self.calls += 1
+        await self._await(self.delay, config)
+        return SimpleNamespace(text=self.reply)
+
+    async def agenerate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        size = max(len(self.reply) // self.chunks, 1)
+
+        async def chunks():
+            for i in range(0, len(self.reply), size):
+                await self._await(self.delay / self.chunks, config)
+                yield SimpleNamespace(text=self.reply[i:i + size])
+        return chunks()
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.datastructures import MultiDict
+
+from extensions import db
+from journal_stats import mood_totals_select, rebuild_all_journal_stats
+from models import Analytics, JournalStats, User
+from services import journal_search, outbox, purger
+
+# ------------------ INDEXES ----------------------
+def ensure_indexes():
+    """Create missing tables, then any declared index missing from an existing one.
+
+    db.create_all() skips tables that already exist, so databases created
+    before an index was declared get it here. Safe to run repeatedly.
+    """
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    journal_search.setup()
+    return created
+
+# The query behind each per-user / per-type lookup, with sample parameters,
+# built by the same functions the routes use
+def _route_queries():
+    from routes.admin import _day_start, analytics_raw_select, analytics_rollup_select
+    from routes.cycle import recent_cycles_select
+    from routes.journal import entries_select, parse_entries_args
+
+    email = 'someone@example.com'
+
+    def entries(**args):
+        opts, _ = parse_entries_args(MultiDict({'user_id': email, **args}))
+        # A page fetches one row more than it returns, like get_entries
+        return entries_select(opts, opts['limit'] + 1 if opts['limit'] else None)
+
+    # admin_analytics?range=30days: weekly buckets from now - 30 days; whole
+    # days up to today from the rollup, the days cut by an edge and today raw
+    now = datetime.utcnow()
+    today = _day_start(now.date())
+    edges = [now - timedelta(days=30) + timedelta(days=7 * i) for i in range(5)]
+    split_days = {e.date() for e in edges}
+    queries = {
+        'login / profile / check-email': db.select(User).filter_by(email=email),
+        'get_entries': entries(),
+        'get_entries (page, newest first)': entries(limit='20', cursor='1000', order='desc'),
+        'get_recommendations (stats)': db.select(JournalStats).filter_by(user_id=email),
+        'get_recommendations (rebuild)': mood_totals_select(email),
+        'get_cycles': recent_cycles_select(email),
+        'admin_analytics (rollup)': analytics_rollup_select(edges, edges[0].date() + timedelta(days=1),
+                                                            today.date(), split_days),
+        'admin_analytics (raw)': analytics_raw_select(edges, [Analytics.timestamp >= today] + [
+            Analytics.timestamp.between(_day_start(d), _day_start(d + timedelta(days=1))) for d in split_days]),
+    }
+    for name, model, column in purger.tables:
+        queries[f'account purge ({name})'] = purger.batch_select(model, column, email)
+    return queries
+
+def explain_route_queries():
+    """EXPLAIN each route query; returns {name: (uses_index, plan lines)}."""
+    results = {}
+    with db.engine.connect() as conn:
+        sqlite = conn.dialect.name == 'sqlite'
+        for name, stmt in _route_queries().items():
+            compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+            params = compiled.params
+            if compiled.positional:
+                params = tuple(params[key] for key in compiled.positiontup)
+            prefix = 'EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN '
+            rows = conn.exec_driver_sql(prefix + str(compiled), params).mappings().all()
+            if sqlite:
+                plan = [row['detail'] for row in rows]
+                # "SCAN <table>" without an index is a full table scan (not
+                # "SCAN CONSTANT ROW" or "SCAN (subquery-1)")
+                uses_index = not any(line.split()[:2] in (['SCAN', t] for t in db.metadata.tables)
+                                     and 'INDEX' not in line for line in plan)
+            else:
+                plan = [f"{row['table']}: type={row['type']} key={row['key']}" for row in rows]
+                uses_index = all(row['type'] != 'ALL' for row in rows)
+            results[name] = (uses_index, plan)
+    return results
+
+@click.command("ensure-indexes")
+@with_appcontext
+def ensure_indexes_command():
+    """Add missing indexes to an existing database."""
+    created = ensure_indexes()
+    print("Created indexes: " + ", ".join(created) if created else "All indexes present")
+
+@click.command("explain-queries")
+@with_appcontext
+def explain_queries_command():
+    """Fail if any route query would scan a whole table."""
+    failed = False
+    for name, (uses_index, plan) in explain_route_queries().items():
+        print(f"{'OK  ' if uses_index else 'SCAN'} {name}")
+        for line in plan:
+            print(f"       {line}")
+        failed = failed or not uses_index
+    if failed:
+        raise SystemExit(1)
+
+@click.command("rebuild-journal-stats")
+@with_appcontext
+def rebuild_journal_stats_command():
+    """Recompute every user's journal aggregates from their entries."""
+    print(f"Rebuilt journal stats for {rebuild_all_journal_stats()} users")
+
+@click.command("send-outbox")
+@with_appcontext
+def send_outbox():
+    """Send every queued email that is due, then exit."""
+    print(f"Processed {outbox.drain()} queued emails")
+
+@click.command("purge-accounts")
+@with_appcontext
+def purge_accounts():
+    """Finish deleting the data of every deleted account, then exit."""
+    print(f"Purged {purger.drain()} deleted accounts")
+
+def register_commands(app):
+    for command in (ensure_indexes_command, explain_queries_command,
+                    rebuild_journal_stats_command, send_outbox, purge_accounts):
+        app.cli.add_command(command)
@@ -0,0 +1,73 @@
+"""gzip / Brotli response compression, negotiated with Accept-Encoding.
+
+JSON and text bodies of at least COMPRESS_MIN_BYTES are compressed with the
+client's preferred coding: Brotli when the ``brotli`` package is installed
+and accepted, else gzip. Streamed bodies (NDJSON, Server-Sent Events) are
+sent as they are, so every line still reaches the client immediately.
+
+A compressed body is a different representation, so a strong ETag gets the
+coding appended ("abc" -> "abc-gzip"); :func:`etag_matches` accepts either
+form in If-None-Match.
+
+    COMPRESS_MIN_BYTES=1024       smaller bodies are not worth a header and a CPU pass
+    COMPRESS_GZIP_LEVEL=6
+    COMPRESS_BROTLI_QUALITY=4     11 is for static files, far too slow per request
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE = {"application/json", "text/plain", "text/html", "text/csv"}
+ALL_CODINGS = ("br", "gzip")
+CODINGS = ALL_CODINGS if brotli is not None else ("gzip",)   # on equal q, the first wins
+
+
+def compress(data, coding):
+    if coding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def etag_matches(if_none_match, etag):
+    return any(if_none_match.contains(tag) for tag in (etag, *(f"{etag}-{c}" for c in ALL_CODINGS)))
+
+
+def compressible(response):
+    return (response.status_code == 200 and response.mimetype in COMPRESSIBLE
+            and "Content-Encoding" not in response.headers)
+
+
+def encode(response, data, accept_encodings):
+    """Replace the body of ``response`` (``data``) with its compressed form, if worth it."""
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add("Accept-Encoding")
+    coding = accept_encodings.best_match(CODINGS)
+    if coding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    response.set_data(compress(data, coding))
+    response.headers["Content-Encoding"] = coding
+    if etag and not weak:
+        response.set_etag(f"{etag}-{coding}")
+    return response
+
+
+def init_app(app):
+    @app.after_request
+    def _compress(response):
+        if compressible(response) and not response.is_streamed and not response.direct_passthrough:
+            encode(response, response.get_data(), request.accept_encodings)
+        return response
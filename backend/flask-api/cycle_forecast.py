@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+# numpy is imported on first use, like in risk_engine
+
+PERIOD_DAYS = 5
+DEFAULT_CYCLE_DAYS = 28
+# Gaps outside this range are taken as duplicate/corrected logs (too short)
+# or months that were never logged (too long), not as real cycles
+MIN_CYCLE_DAYS = 15
+MAX_CYCLE_DAYS = 120
+# Ovulation to the next period; varies far less than the first half of a cycle
+LUTEAL_DAYS = 14
+# Fertile window: FERTILE_BEFORE days before ovulation to FERTILE_AFTER after
+FERTILE_BEFORE = 4
+FERTILE_AFTER = 1
+# Two-sided 80% interval of a normal distribution
+CONFIDENCE_Z = 1.2816
+MAX_FORECAST_CYCLES = 12
+
+
+def cycle_stats(period_dates):
+    """Mean and standard deviation of the cycle length from logged period start dates.
+
+    Returns ``(last_period, length, std, cycles)`` with ``last_period`` a
+    ``numpy.datetime64`` day (None without dates) and ``cycles`` the number
+    of gaps used. Without at least one usable gap the length is
+    DEFAULT_CYCLE_DAYS with no spread.
+    """
+    import numpy as np
+
+    days = np.unique(np.asarray(period_dates, dtype="datetime64[D]"))
+    if days.size == 0:
+        return None, float(DEFAULT_CYCLE_DAYS), 0.0, 0
+    gaps = np.diff(days).astype(np.int64)
+    gaps = gaps[(gaps >= MIN_CYCLE_DAYS) & (gaps <= MAX_CYCLE_DAYS)]
+    if gaps.size == 0:
+        return days[-1], float(DEFAULT_CYCLE_DAYS), 0.0, 0
+    std = float(gaps.std(ddof=1)) if gaps.size > 1 else 0.0
+    return days[-1], float(gaps.mean()), std, int(gaps.size)
+
+
+def project(start, length, std, cycles):
+    """Phase ranges of the next ``cycles`` periods after the period starting on ``start``.
+
+    Everything is computed as one (cycles x 8) array of day offsets and
+    formatted in a single call. Cycle ``k`` starts around ``start + k *
+    length``; its window widens with ``sqrt(k)`` since every cycle adds its
+    own variation. Each item holds the fertile window and ovulation leading
+    up to that period, as ``[start, end]`` date strings.
+    """
+    import numpy as np
+
+    k = np.arange(1, cycles + 1)
+    center = np.rint(k * length).astype(np.int64)
+    half = np.maximum(1, np.rint(CONFIDENCE_Z * std * np.sqrt(k))).astype(np.int64)
+    ovulation = center - LUTEAL_DAYS
+    offsets = np.stack([
+        center, center + PERIOD_DAYS - 1,                  # period
+        center - half, center + half,                      # window for its first day
+        ovulation - FERTILE_BEFORE, ovulation + FERTILE_AFTER,
+        ovulation, ovulation,
+    ], axis=1)
+    dates = np.datetime_as_string(np.datetime64(start, "D") + offsets, unit="D").tolist()
+    return [{
+        "period": row[0:2],
+        "window": row[2:4],
+        "fertile_window": row[4:6],
+        "ovulation": row[6],
+    } for row in dates]
+
+
+def entry_phases(period_date, length, std):
+    """Phases of the period logged on ``period_date``: its days, the predicted ovulation and next period."""
+    nxt = project(period_date, length, std, 1)[0]
+    return {
+        "period": [period_date.isoformat(), (period_date + timedelta(days=PERIOD_DAYS - 1)).isoformat()],
+        "fertile_window": nxt["fertile_window"],
+        "ovulation": nxt["ovulation"],
+        "next_period": nxt["window"],
+    }
+
+
+def forecast(period_dates, cycles=3):
+    """Cycle statistics and the next ``cycles`` periods projected from the latest logged one."""
+    last, length, std, used = cycle_stats(period_dates)
+    return {
+        "cycle": {"length": round(length, 1), "std": round(std, 1), "cycles_used": used},
+        "last_period": None if last is None else str(last),
+        "forecast": [] if last is None else project(last, length, std, min(cycles, MAX_FORECAST_CYCLES)),
+    }
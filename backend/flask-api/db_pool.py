@@ -0,0 +1,94 @@
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class TimedPoolMixin:
+    """Counts checkouts, how long they waited and how many timed out.
+
+    The wait covers queueing for a free connection plus opening or
+    pre-pinging it, i.e. what a request actually spends before its first
+    query. Counters start over when the pool is recreated (engine.dispose()).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url, is_async=False):
+    """Engine keyword arguments for ``url`` from the DB_* environment variables.
+
+    DB_POOL_SIZE / DB_MAX_OVERFLOW    connections kept open / opened on top under load
+    DB_POOL_TIMEOUT                   seconds to wait for a free connection
+    DB_POOL_RECYCLE                   reopen connections older than this (below MySQL's wait_timeout)
+    DB_POOL_PRE_PING                  test a connection before handing it out (default on)
+    DB_STATEMENT_TIMEOUT_MS           MySQL max_execution_time for SELECTs (0 = none)
+    """
+    url = make_url(url)
+    options = {"pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1"}
+
+    # In-memory SQLite is a single shared connection, not a pool
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update({
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    })
+
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    if statement_timeout and url.get_backend_name() == "mysql":
+        # Run on every new connection (pymysql and aiomysql both accept it)
+        options["connect_args"] = {"init_command": f"SET SESSION max_execution_time={statement_timeout}"}
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, TimedPoolMixin):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "wait_avg_ms": round(pool.wait_total / pool.checkouts * 1000, 2) if pool.checkouts else 0.0,
+            "wait_max_ms": round(pool.wait_max * 1000, 2),
+        })
+    return stats
@@ -0,0 +1,14 @@
+from flask_sqlalchemy import SQLAlchemy
+
+# Bound to the app in create_app()
+db = SQLAlchemy()
+
+
+def read_bind():
+    """bind_arguments for read-only queries: the "replica" bind if configured, else the primary.
+
+        db.session.execute(stmt, bind_arguments=read_bind())
+
+    A replica may lag behind; don't read back rows written in the same request.
+    """
+    return {"bind": db.engines.get("replica", db.engine)}
@@ -0,0 +1,34 @@
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import the app (and, with WARM_UP=1, load the risk model) once in the
+# master; forked workers share those pages copy-on-write
+preload_app = True
+os.environ.setdefault("WARM_UP", "1")
+
+
+def when_ready(server):
+    # Tables, indexes and the journal search index, once in the master before
+    # any worker serves (a no-op when `flask ensure-indexes` already ran)
+    from commands import ensure_indexes
+    with server.app.wsgi().app_context():
+        ensure_indexes()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with workers
+    from extensions import db
+    from services import hasher, outbox, purger
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # Fork the hashing pool now, while this worker has no other threads
+    hasher.warm_up()
+    # Every worker sends queued mail and runs a purger; leases keep two
+    # workers from taking the same message or account
+    outbox.start()
+    purger.start()
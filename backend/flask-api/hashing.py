@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when every hashing slot is taken; routes answer 503."""
+
+
+# Run in the worker processes, so keep them importable and cheap
+def _generate(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _check(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+def _method_cost(method):
+    """``(algorithm, cost)`` of a werkzeug method string, with werkzeug's defaults filled in."""
+    name, *params = method.split(":")
+    if name == "pbkdf2":
+        digest = params[0] if params else "sha256"
+        return f"pbkdf2:{digest}", int(params[1]) if len(params) > 1 else DEFAULT_PBKDF2_ITERATIONS
+    if name == "scrypt":
+        return "scrypt", int(params[0]) if params else 2 ** 15
+    return method, 0
+
+
+class PasswordHasher:
+    """Runs pbkdf2 hashing in a bounded process pool off the request thread.
+
+    At most ``workers + max_queue`` hashes may be running or waiting; past
+    that :class:`HashingBusy` is raised immediately instead of queueing.
+    ``method`` is the full werkzeug method string including the cost (e.g.
+    ``pbkdf2:sha256:1000000``); stored hashes made with another algorithm or
+    a lower cost are reported by :meth:`needs_rehash` so logins can upgrade
+    them in place. Stronger hashes are never rewritten to a weaker method.
+    With ``workers=0`` hashing runs inline (handy for local development).
+    """
+
+    def __init__(self, method=f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}", salt_length=16, workers=2, max_queue=8):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        with self._lock:
+            # A forked web worker can't use its parent's pool
+            if self._pool is None or self._pid != os.getpid():
+                # fork starts every worker on first use and, unlike spawn,
+                # doesn't re-run the web app's __main__ in each of them
+                method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method)
+                )
+                self._pid = os.getpid()
+            return self._pool
+
+    def warm_up(self):
+        # Start the workers now, before the app starts its background threads
+        if self.workers > 0:
+            self._executor().submit(_check, "", "").result()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_generate, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        if not pwhash or password is None:
+            return False
+        return self._run(_check, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        # Only ever upgrade: a different algorithm, or the same one at a lower cost
+        try:
+            algorithm, cost = _method_cost(pwhash.split("$", 1)[0])
+        except ValueError:
+            return True
+        target_algorithm, target_cost = _method_cost(self.method)
+        return algorithm != target_algorithm or cost < target_cost
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
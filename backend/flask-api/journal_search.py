@@ -0,0 +1,198 @@
+import logging
+import re
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_SETUP = [
+    # External-content FTS5 table over entry.entry, keyed by entry.id. ``owner``
+    # is the author's user_id as one hex token, so a MATCH on it keeps a
+    # search inside that user's entries instead of filtering every user's hits
+    "CREATE VIEW IF NOT EXISTS entry_fts_content AS "
+    "SELECT id, entry, hex(user_id) AS owner FROM entry",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS entry_fts USING fts5("
+    "entry, owner, content='entry_fts_content', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ai AFTER INSERT ON entry BEGIN "
+    "INSERT INTO entry_fts(rowid, entry, owner) VALUES (new.id, new.entry, hex(new.user_id)); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_ad AFTER DELETE ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, entry, owner) "
+    "VALUES ('delete', old.id, old.entry, hex(old.user_id)); END",
+    "CREATE TRIGGER IF NOT EXISTS entry_fts_au AFTER UPDATE OF entry, user_id ON entry BEGIN "
+    "INSERT INTO entry_fts(entry_fts, rowid, entry, owner) "
+    "VALUES ('delete', old.id, old.entry, hex(old.user_id)); "
+    "INSERT INTO entry_fts(rowid, entry, owner) VALUES (new.id, new.entry, hex(new.user_id)); END",
+]
+
+# An entry_fts from before ``owner`` existed is dropped and built again
+_SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS entry_fts_ai",
+    "DROP TRIGGER IF EXISTS entry_fts_ad",
+    "DROP TRIGGER IF EXISTS entry_fts_au",
+    "DROP TABLE IF EXISTS entry_fts",
+]
+
+
+def _sqlite_fts_columns(conn):
+    if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = 'entry_fts'").first() is None:
+        return []
+    return [row[1] for row in conn.exec_driver_sql("PRAGMA table_info(entry_fts)")]
+
+
+class JournalSearch:
+    """Full-text search over journal entries.
+
+    SQLite gets an FTS5 table kept in sync with ``entry`` by triggers, so
+    every insert from ``add_entry`` (and every delete) is indexed in the same
+    transaction. The author is indexed with the text, so a search only walks
+    that user's postings, however many entries other users have. MySQL gets
+    a FULLTEXT index, which InnoDB maintains itself; it can't be combined
+    with the user_id index, so there the match covers every user's entries.
+
+    :meth:`setup` runs the DDL and belongs to ``flask ensure-indexes`` and
+    startup, never to a request. Until the index exists (and on other
+    databases) :meth:`search` falls back to LIKE; whether it exists is
+    checked at most every ``recheck`` seconds.
+    """
+
+    def __init__(self, db, recheck=60.0):
+        self.db = db
+        self.recheck = recheck
+        self._ready = False
+        self._next_check = 0.0
+
+    @property
+    def dialect(self):
+        return self.db.engine.dialect.name
+
+    @property
+    def available(self):
+        if not self._ready and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.recheck
+            with self.db.engine.connect() as conn:
+                self._ready = self._index_exists(conn)
+        return self._ready
+
+    def _index_exists(self, conn):
+        if self.dialect == "sqlite":
+            return "owner" in _sqlite_fts_columns(conn)
+        if self.dialect == "mysql":
+            return conn.exec_driver_sql(
+                "SHOW INDEX FROM entry WHERE Key_name = 'ft_entry_entry'").first() is not None
+        return False
+
+    def setup(self):
+        """Create the full-text index if missing; False on databases without one."""
+        if self._ready:
+            return True
+        if self.dialect not in ("sqlite", "mysql"):
+            logger.warning("Journal search has no full-text index on %s; using LIKE", self.dialect)
+            return False
+        with self.db.engine.begin() as conn:
+            if self.dialect == "sqlite":
+                columns = _sqlite_fts_columns(conn)
+                if columns and "owner" not in columns:
+                    for statement in _SQLITE_DROP:
+                        conn.exec_driver_sql(statement)
+                exists = "owner" in columns
+                for statement in _SQLITE_SETUP:
+                    conn.exec_driver_sql(statement)
+                if not exists:
+                    # Index the entries written before search existed
+                    conn.exec_driver_sql("INSERT INTO entry_fts(entry_fts) VALUES ('rebuild')")
+            elif self.dialect == "mysql":
+                exists = conn.exec_driver_sql(
+                    "SHOW INDEX FROM entry WHERE Key_name = 'ft_entry_entry'").first()
+                if not exists:
+                    conn.exec_driver_sql("CREATE FULLTEXT INDEX ft_entry_entry ON entry (entry)")
+        self._ready = True
+        return True
+
+    def search(self, user_id, q, mood=None, date_from=None, date_to=None, limit=20, offset=0):
+        """Return (results, total) ranked best match first."""
+        words = _WORD.findall(q)
+        if not words:
+            return [], 0
+
+        filters = ["e.user_id = :user_id"]
+        params = {"user_id": user_id, "limit": limit, "offset": offset}
+        if mood:
+            filters.append("e.mood = :mood")
+            params["mood"] = mood
+        if date_from:
+            filters.append("e.date >= :date_from")
+            params["date_from"] = date_from
+        if date_to:
+            filters.append("e.date <= :date_to")
+            params["date_to"] = date_to
+
+        if not self.available:
+            return self._search_like(words, filters, params)
+        if self.dialect == "sqlite":
+            # Quote every word so user input can't be read as FTS5 syntax. The
+            # owner token limits the match to this user's entries; the user_id
+            # filter stays as the authority (porter may stem two owners alike)
+            terms = " ".join('"%s"' % w.replace('"', '') for w in words)
+            params["match"] = f'owner : "{user_id.encode().hex()}" AND entry : ({terms})'
+            where = "entry_fts MATCH :match AND " + " AND ".join(filters)
+            base = f"FROM entry_fts JOIN entry e ON e.id = entry_fts.rowid WHERE {where}"
+            # bm25 weights: only the entry text counts towards the score
+            select = (f"SELECT e.id, e.date, e.mood, "
+                      f"snippet(entry_fts, 0, '**', '**', '…', 16) AS snippet, "
+                      f"-bm25(entry_fts, 1.0, 0.0) AS score {base} "
+                      f"ORDER BY bm25(entry_fts, 1.0, 0.0), e.id DESC LIMIT :limit OFFSET :offset")
+        else:
+            params["match"] = " ".join(words)
+            match = "MATCH(e.entry) AGAINST (:match IN NATURAL LANGUAGE MODE)"
+            base = f"FROM entry e WHERE {match} AND " + " AND ".join(filters)
+            select = (f"SELECT e.id, e.date, e.mood, e.entry AS snippet, {match} AS score {base} "
+                      f"ORDER BY score DESC, e.id DESC LIMIT :limit OFFSET :offset")
+
+        session = self.db.session
+        total = session.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+        rows = session.execute(text(select), params).mappings().all()
+        results = []
+        for row in rows:
+            snippet = row["snippet"]
+            if self.dialect != "sqlite":
+                snippet = _snippet(snippet, words)
+            results.append({
+                "id": row["id"],
+                "date": row["date"],
+                "mood": row["mood"],
+                "snippet": snippet,
+                "score": round(float(row["score"]), 6),
+            })
+        return results, total
+
+    def _search_like(self, words, filters, params):
+        # Every word as a substring, newest first; scored by occurrences on the page
+        for i, word in enumerate(words):
+            # Words are \w+, so "_" is the only wildcard they can hold
+            filters.append(f"e.entry LIKE :w{i} ESCAPE '!'")
+            params[f"w{i}"] = "%" + word.replace("_", "!_") + "%"
+        base = "FROM entry e WHERE " + " AND ".join(filters)
+        session = self.db.session
+        total = session.execute(text(f"SELECT COUNT(*) {base}"), params).scalar()
+        rows = session.execute(text(f"SELECT e.id, e.date, e.mood, e.entry {base} "
+                                    f"ORDER BY e.id DESC LIMIT :limit OFFSET :offset"), params).mappings().all()
+        return [{
+            "id": row["id"],
+            "date": row["date"],
+            "mood": row["mood"],
+            "snippet": _snippet(row["entry"], words),
+            "score": float(sum(row["entry"].lower().count(w.lower()) for w in words)),
+        } for row in rows], total
+
+
+def _snippet(body, words, width=120):
+    # Text around the first matching word, for backends without snippet()
+    lowered = body.lower()
+    hits = [lowered.find(w.lower()) for w in words]
+    hits = [h for h in hits if h >= 0]
+    start = max(min(hits) - width // 3, 0) if hits else 0
+    piece = body[start:start + width]
+    return ("…" if start > 0 else "") + piece + ("…" if start + width < len(body) else "")
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import Entry, JournalStats
+
+# Running per-user journal aggregates, so recommendations don't rescan history
+MOOD_SCORES = {"Very Low": 1, "Low": 2, "Sad": 3, "Average": 4, "Happy": 5}
+
+def _parse_cycle(value):
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _mood_score_sql():
+    return case(*[(Entry.mood == mood, score) for mood, score in MOOD_SCORES.items()], else_=3)
+
+def mood_totals_select(user_id):
+    return (select(func.coalesce(func.sum(_mood_score_sql()), 0), func.count(Entry.id), func.max(Entry.id))
+            .where(Entry.user_id == user_id))
+
+def build_journal_stats(user_id):
+    """Compute a user's JournalStats from their entries (not added to the session)."""
+    mood_sum, mood_count, last_id = db.session.execute(mood_totals_select(user_id)).one()
+
+    # Newest entry whose cycle parses; usually the first row
+    last_cycle = None
+    cycles = (db.session.query(Entry.cycle).filter(Entry.user_id == user_id)
+              .order_by(Entry.id.desc()).execution_options(yield_per=100))
+    for (cycle,) in cycles:
+        last_cycle = _parse_cycle(cycle)
+        if last_cycle is not None:
+            break
+
+    return JournalStats(user_id=user_id, mood_sum=int(mood_sum), mood_count=mood_count,
+                        last_cycle=last_cycle, last_entry_id=last_id)
+
+def update_journal_stats(entry):
+    """Fold a newly flushed entry into its user's stats, in the caller's transaction."""
+    values = {
+        "mood_sum": JournalStats.mood_sum + MOOD_SCORES.get(entry.mood, 3),
+        "mood_count": JournalStats.mood_count + 1,
+        "last_entry_id": entry.id,
+    }
+    cycle = _parse_cycle(entry.cycle)
+    if cycle is not None:
+        values["last_cycle"] = cycle
+
+    if db.session.get(JournalStats, entry.user_id) is None:
+        # First entry since stats existed: build from history (includes this entry)
+        try:
+            with db.session.begin_nested():
+                db.session.add(build_journal_stats(entry.user_id))
+            return
+        except IntegrityError:
+            pass  # created concurrently; apply this entry on top below
+    db.session.execute(update(JournalStats)
+                       .where(JournalStats.user_id == entry.user_id)
+                       .values(**values))
+
+def rebuild_all_journal_stats():
+    """Recompute every user's stats in one pass over the entry table."""
+    mood_rows = (db.session.query(Entry.user_id, func.sum(_mood_score_sql()),
+                                  func.count(Entry.id), func.max(Entry.id))
+                 .group_by(Entry.user_id).all())
+    last_cycles = {}
+    rows = (db.session.query(Entry.user_id, Entry.cycle)
+            .order_by(Entry.user_id, Entry.id.desc()).execution_options(yield_per=1000))
+    for user_id, cycle in rows:
+        if user_id not in last_cycles:
+            last_cycles[user_id] = None
+        if last_cycles[user_id] is None:
+            last_cycles[user_id] = _parse_cycle(cycle)
+
+    db.session.query(JournalStats).delete()
+    if mood_rows:
+        db.session.execute(insert(JournalStats), [
+            {"user_id": user_id, "mood_sum": int(mood_sum), "mood_count": count,
+             "last_cycle": last_cycles.get(user_id), "last_entry_id": last_id,
+             "updated_at": datetime.utcnow()}
+            for user_id, mood_sum, count, last_id in mood_rows
+        ])
+    db.session.commit()
+    return len(mood_rows)
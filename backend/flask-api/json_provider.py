@@ -0,0 +1,85 @@
+"""JSON providers for the Flask app and the Quart app in asgi.py.
+
+JSON_PROVIDER=orjson (the default) serializes with orjson when it is
+installed, several times faster than the stdlib; JSON_PROVIDER=stdlib keeps
+the json module. Both write dates and datetimes as ISO 8601 ("2026-01-31")
+instead of Flask's HTTP dates, sort keys and leave non-ASCII text (the emoji
+in the tips) unescaped, so a payload is the same bytes, and has the same
+ETag, whichever provider produced it.
+"""
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (date, datetime, time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """The stdlib provider with ISO dates and UTF-8 output."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+    def _pretty(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._response_body(obj), mimetype=self.mimetype)
+
+    def _response_body(self, obj):
+        if self._pretty():
+            return f"{self.dumps(obj, indent=2)}\n"
+        return f"{self.dumps(obj, separators=(',', ':'))}\n"
+
+
+class OrjsonProvider(IsoJSONProvider):
+    """orjson for response bodies, dumps() without arguments and request parsing.
+
+    dumps() calls with json.dumps keyword arguments fall back to the stdlib.
+    """
+
+    OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def _response_body(self, obj):
+        option = self.OPTIONS | orjson.OPT_APPEND_NEWLINE
+        if self._pretty():
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def json_provider(app, name="orjson"):
+    """Provider ``name`` for ``app``; orjson falls back to the stdlib when not installed."""
+    if name not in ("orjson", "stdlib"):
+        raise ValueError(f"Unknown JSON provider: {name}")
+    if name == "orjson" and orjson is not None:
+        return OrjsonProvider(app)
+    return IsoJSONProvider(app)
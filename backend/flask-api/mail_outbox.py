@@ -0,0 +1,267 @@
+import atexit
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import and_, or_, update
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` logged-in SMTP connections open for reuse."""
+
+    def __init__(self, config, size=2, timeout=30, idle_check=60):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        host = self.config.get("MAIL_SERVER", "localhost")
+        port = self.config.get("MAIL_PORT", 25)
+        if self.config.get("MAIL_USE_SSL"):
+            conn = smtplib.SMTP_SSL(host, port, timeout=self.timeout)
+        else:
+            conn = smtplib.SMTP(host, port, timeout=self.timeout)
+            if self.config.get("MAIL_USE_TLS"):
+                conn.starttls()
+        username = self.config.get("MAIL_USERNAME")
+        if username:
+            conn.login(username, self.config.get("MAIL_PASSWORD") or "")
+        return conn
+
+    def acquire(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            # Connections idle for a while may have been dropped by the server
+            if time.monotonic() - last_used < self.idle_check:
+                return conn
+            try:
+                if conn.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            self.discard(conn)
+
+    def release(self, conn):
+        if self._idle.qsize() >= self.size:
+            self.discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    def discard(self, conn):
+        try:
+            conn.quit()
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(conn)
+
+
+class OutboxDispatcher:
+    """Drains the persistent email outbox on a background thread.
+
+    Request handlers only insert an outbox row and call :meth:`notify`.
+    The dispatcher claims due rows in batches, splits each batch into groups
+    that are sent over one pooled SMTP connection each, and reschedules
+    failures with exponential backoff until ``MAIL_OUTBOX_MAX_ATTEMPTS``.
+    Settings are read from the app config in :meth:`init_app`.
+    """
+
+    def __init__(self, app=None, db=None, model=None):
+        self.db = db
+        self.model = model
+        self.app = None
+        self.pool = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        cfg = app.config
+        self.pool_size = int(cfg.get("MAIL_OUTBOX_POOL_SIZE", 2))
+        self.batch_size = int(cfg.get("MAIL_OUTBOX_BATCH_SIZE", 50))
+        self.per_connection = int(cfg.get("MAIL_OUTBOX_PER_CONNECTION", 20))
+        self.max_attempts = int(cfg.get("MAIL_OUTBOX_MAX_ATTEMPTS", 5))
+        self.backoff = float(cfg.get("MAIL_OUTBOX_BACKOFF", 30))
+        self.poll_interval = float(cfg.get("MAIL_OUTBOX_POLL_INTERVAL", 5))
+        self.lease = float(cfg.get("MAIL_OUTBOX_LEASE", 300))
+        self.pool = SMTPConnectionPool(cfg, size=self.pool_size)
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._start_lock:
+            # A forked worker inherits the object but not the thread
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="mail-outbox", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        if self.pool is not None:
+            self.pool.close()
+
+    def notify(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    processed = self.dispatch_once()
+            except Exception:
+                logger.exception("Mail outbox dispatch failed")
+                processed = 0
+            if processed:
+                continue    # more may be waiting, don't sleep
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def drain(self):
+        # Send everything that is due right now (CLI / tests)
+        total = 0
+        with self.app.app_context():
+            while True:
+                n = self.dispatch_once()
+                if not n:
+                    return total
+                total += n
+
+    # ---------- claiming ----------
+    def _due(self, now):
+        m = self.model
+        return or_(
+            and_(m.status == "pending", m.next_attempt_at <= now),
+            and_(m.status == "sending", m.locked_until < now),   # lease expired (crashed sender)
+        )
+
+    def _claim(self):
+        m = self.model
+        session = self.db.session
+        now = datetime.utcnow()
+        ids = [row[0] for row in session.query(m.id)
+               .filter(self._due(now))
+               .order_by(m.id)
+               .limit(self.batch_size)]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        session.execute(
+            update(m)
+            .where(m.id.in_(ids), self._due(now))
+            .values(status="sending", claim_token=token,
+                    locked_until=now + timedelta(seconds=self.lease))
+        )
+        session.commit()
+        return m.query.filter_by(claim_token=token, status="sending").all()
+
+    # ---------- sending ----------
+    def _build(self, row):
+        msg = EmailMessage()
+        msg["Subject"] = row.subject
+        msg["From"] = row.sender or self.app.config.get("MAIL_DEFAULT_SENDER") or self.app.config.get("MAIL_USERNAME")
+        msg["To"] = row.recipients
+        if row.reply_to:
+            msg["Reply-To"] = row.reply_to
+        msg.set_content(row.body)
+        return msg
+
+    def _send_group(self, group):
+        # One pooled connection per group; returns {id: error or None}
+        results = {}
+        conn = None
+        try:
+            conn = self.pool.acquire()
+            for row_id, msg in group:
+                try:
+                    conn.send_message(msg)
+                    results[row_id] = None
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                        smtplib.SMTPDataError, ValueError) as e:
+                    results[row_id] = e     # this message only, connection is still usable
+        except Exception as e:
+            # Connection-level failure: drop it and retry everything not yet sent
+            if conn is not None:
+                self.pool.discard(conn)
+                conn = None
+            for row_id, _ in group:
+                results.setdefault(row_id, e)
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+        return results
+
+    def dispatch_once(self):
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        messages = []
+        results = {}
+        for row in rows:
+            try:
+                messages.append((row.id, self._build(row)))
+            except Exception as e:
+                results[row.id] = e
+        groups = [messages[i:i + self.per_connection]
+                  for i in range(0, len(messages), self.per_connection)]
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            for group_results in executor.map(self._send_group, groups):
+                results.update(group_results)
+
+        now = datetime.utcnow()
+        for row in rows:
+            error = results.get(row.id)
+            row.attempts += 1
+            row.claim_token = None
+            row.locked_until = None
+            if error is None:
+                row.status = "sent"
+                row.sent_at = now
+                row.last_error = None
+                continue
+            row.last_error = str(error)[:500]
+            permanent = (getattr(error, "smtp_code", 0) >= 500
+                         or isinstance(error, (smtplib.SMTPRecipientsRefused, ValueError, TypeError)))
+            if permanent or row.attempts >= self.max_attempts:
+                row.status = "failed"
+                logger.warning("Email %s to %s failed: %s", row.id, row.recipients, error)
+            else:
+                row.status = "pending"
+                row.next_attempt_at = now + timedelta(seconds=self.backoff * 2 ** (row.attempts - 1))
+        self.db.session.commit()
+        return len(rows)
@@ -0,0 +1,264 @@
+"""Request, database, model and Gemini timings in Prometheus text format.
+
+Each process keeps its own counters; with several gunicorn workers,
+Prometheus scrapes every worker (or the numbers describe the worker that
+answered /metrics).
+
+SLOW_REQUEST_MS=500 logs requests slower than that with their queries
+grouped by statement, so N+1 loops (one statement run many times) and slow
+scans stand out. Off by default.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from db_pool import TimedPoolMixin
+from extensions import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+REGISTRY = []
+COLLECTORS = []
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(values)) for key, values in sorted(self._series.items())]
+        for key, values in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), values):
+                cumulative += n
+                le = bound if bound == "+Inf" else _number(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+def collector(fn):
+    """Register ``fn() -> [(name, type, help, [(labels dict, value), ...]), ...]``, read at scrape time."""
+    COLLECTORS.append(fn)
+    return fn
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for fn in COLLECTORS:
+        for name, kind, help, samples in fn():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+#---- REQUESTS AND QUERIES ----
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by endpoint",
+                            ["endpoint", "method"])
+REQUESTS = Counter("http_requests_total", "Requests by endpoint and status", ["endpoint", "method", "status"])
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements run per request",
+                            ["endpoint"], buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request", ["endpoint"])
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "Latency of single SQL statements")
+
+
+#---- MODEL AND GEMINI ----
+MODEL_INFERENCE_SECONDS = Histogram("model_inference_seconds", "PCOS risk model scoring time",
+                                    ["kind"], buckets=(0.0005, 0.001, 0.0025) + LATENCY_BUCKETS)
+GEMINI_SECONDS = Histogram("gemini_request_seconds", "Gemini call latency (whole stream for streamed replies)",
+                           ["outcome"], buckets=LATENCY_BUCKETS + (60.0,))
+
+
+#---- ACCOUNT PURGE ----
+ACCOUNT_PURGE_ROWS = Counter("account_purge_rows_deleted_total", "Rows deleted by the account purger", ["table"])
+
+
+#---- RESPONSE CACHE ----
+RESPONSE_CACHE = Counter("response_cache_requests_total",
+                         "Cached read endpoints by result (hit, not_modified, miss)", ["namespace", "result"])
+
+
+class RequestStats:
+    __slots__ = ("start", "queries", "db_seconds", "statements")
+
+    def __init__(self, keep_statements=False):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+
+# Works for both request threads and asyncio tasks (the ASGI routes)
+_current = ContextVar("request_stats", default=None)
+
+
+def start_request():
+    stats = RequestStats(keep_statements=SLOW_REQUEST_MS > 0)
+    _current.set(stats)
+    return stats
+
+
+def finish_request(stats, endpoint, method, status, path, logger):
+    _current.set(None)
+    elapsed = time.perf_counter() - stats.start
+    endpoint = endpoint or "<unmatched>"
+
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=method)
+    REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    REQUEST_QUERIES.observe(stats.queries, endpoint=endpoint)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, endpoint=endpoint)
+
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        logger.warning(slow_request_report(stats, elapsed, method, path, endpoint))
+
+
+def slow_request_report(stats, elapsed, method, path, endpoint):
+    grouped = {}
+    for statement, seconds in stats.statements:
+        count, total = grouped.get(statement, (0, 0.0))
+        grouped[statement] = (count + 1, total + seconds)
+
+    lines = [f"Slow request {method} {path} ({endpoint}): {elapsed * 1000:.1f} ms, "
+             f"{stats.queries} queries in {stats.db_seconds * 1000:.1f} ms"]
+    for statement, (count, total) in sorted(grouped.items(), key=lambda item: -item[1][1]):
+        text = " ".join(statement.split())
+        lines.append(f"  {count:>4}x {total * 1000:9.1f} ms  {text[:300]}")
+    return "\n".join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    QUERY_SECONDS.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append((statement, elapsed))
+
+
+def instrument_sqlalchemy():
+    # Every engine: primary, replica and the ASGI async engines
+    if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@collector
+def _pool_metrics():
+    # Read inside the /metrics request, so the app's engines are available
+    samples = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not isinstance(pool, TimedPoolMixin):
+            continue
+        labels = {"bind": bind or "primary"}
+        for name, value in [("checked_out", pool.checkedout()), ("overflow", max(pool.overflow(), 0)),
+                            ("size", pool.size()), ("checkouts_total", pool.checkouts),
+                            ("timeouts_total", pool.timeouts), ("wait_seconds_total", pool.wait_total),
+                            ("wait_max_seconds", pool.wait_max)]:
+            samples.setdefault(name, []).append((labels, value))
+
+    return [(f"db_pool_{name}", "counter" if name.endswith("_total") else "gauge",
+             f"Connection pool {name.replace('_', ' ')}", values) for name, values in samples.items()]
+
+
+def init_app(app):
+    instrument_sqlalchemy()
+
+    @app.before_request
+    def _start_timer():
+        g.request_stats = start_request()
+
+    # Recorded when the server closes the response, so streamed bodies
+    # (NDJSON entries, bot SSE) are timed until their last chunk
+    @app.after_request
+    def _finish_timer(response):
+        stats = g.pop("request_stats", None)
+        if stats is not None:
+            args = (stats, request.endpoint, request.method, response.status_code, request.path, app.logger)
+            response.call_on_close(lambda: finish_request(*args))
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
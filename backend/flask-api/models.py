@@ -0,0 +1,134 @@
+from datetime import datetime
+
+from extensions import db
+
+# Database Models
+class User(db.Model):
+    __tablename__ = 'swastha_users'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(200), nullable=False)
+
+class Feedback(db.Model):
+    __tablename__ = 'feedback'
+    id = db.Column(db.Integer, primary_key=True)
+    user_email = db.Column(db.String(120), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text, nullable=True)
+    __table_args__ = (db.Index('ix_feedback_user_email', 'user_email'),)
+
+# Analytics Table
+class Analytics(db.Model):
+    __tablename__ = 'analytics'
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)  # 'visit' or 'login'
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_analytics_type_timestamp', 'type', 'timestamp'),)
+
+# Daily analytics rollup (complete days only, see refresh_analytics_rollup)
+class AnalyticsDaily(db.Model):
+    __tablename__ = 'analytics_daily'
+    day = db.Column(db.Date, primary_key=True)
+    type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Email Outbox (drained in the background by mail_outbox.OutboxDispatcher)
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(120), nullable=True)
+    recipients = db.Column(db.Text, nullable=False)
+    reply_to = db.Column(db.String(120), nullable=True)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    __table_args__ = (db.Index('ix_email_outbox_due', 'status', 'next_attempt_at'),)
+
+# Journal
+class Entry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(50), nullable=False)
+    age = db.Column(db.Integer, nullable=True)
+    weight = db.Column(db.String(20), nullable=True)
+    cycle = db.Column(db.String(20), nullable=True)
+    date = db.Column(db.String(20), nullable=False)
+    mood = db.Column(db.String(20), nullable=False)
+    entry = db.Column(db.Text, nullable=False)
+    # Per-user lookups, newest first by id
+    __table_args__ = (db.Index('ix_entry_user_id_id', 'user_id', 'id'),)
+
+# Running per-user journal aggregates, so recommendations don't rescan history
+class JournalStats(db.Model):
+    __tablename__ = 'journal_stats'
+    user_id = db.Column(db.String(50), primary_key=True)
+    mood_sum = db.Column(db.Integer, nullable=False, default=0)
+    mood_count = db.Column(db.Integer, nullable=False, default=0)
+    last_cycle = db.Column(db.Integer, nullable=True)       # newest parseable Entry.cycle
+    last_entry_id = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# PCOS risk predictions
+class PcosRiskEntry(db.Model):
+    __tablename__ = "pcos_risk"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    email = db.Column(db.String(255), nullable=False)
+    risk_score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_pcos_risk_email_created_at', 'email', 'created_at'),)
+
+# Track cycle (calendar)
+class CycleEntry(db.Model):
+    __tablename__ = 'cycle_entries'
+    id = db.Column(db.Integer, primary_key=True)
+    user_email = db.Column(db.String(120), nullable=False)
+    period_date = db.Column(db.Date, nullable=False)
+    ovulation_date = db.Column(db.Date, nullable=False)
+    fertile_start = db.Column(db.Date, nullable=False)
+    fertile_end = db.Column(db.Date, nullable=False)
+    next_period_start = db.Column(db.Date, nullable=False)
+    next_period_end = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # get_cycles: WHERE user_email = ? ORDER BY created_at DESC
+    __table_args__ = (db.Index('ix_cycle_entries_user_email_created_at', 'user_email', 'created_at'),)
+
+# Bot conversations shared by every worker (bot_service.SqlBackend)
+class BotConversation(db.Model):
+    __tablename__ = 'bot_conversations'
+    id = db.Column(db.String(64), primary_key=True)     # ConversationStore key, "bot:<uuid hex>"
+    data = db.Column(db.Text, nullable=False)           # JSON: turns, summary, tokens
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Accounts removed by delete_account whose data account_purge.AccountPurger
+# deletes in the background
+class AccountPurge(db.Model):
+    __tablename__ = 'account_purges'
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(32), unique=True, nullable=False)   # for GET /api/delete-account/<token>
+    email = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, purging, done
+    progress = db.Column(db.JSON, nullable=False, default=dict)     # table -> rows deleted so far
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    requested_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    __table_args__ = (db.Index('ix_account_purges_email', 'email'),
+                      db.Index('ix_account_purges_due', 'status', 'next_attempt_at'))
+
+# Every table holding a user's rows: (name, model, column with the user's email)
+USER_TABLES = [
+    ("journal", Entry, Entry.user_id),
+    ("cycles", CycleEntry, CycleEntry.user_email),
+    ("pcos_risk", PcosRiskEntry, PcosRiskEntry.email),
+    ("feedback", Feedback, Feedback.user_email),
+]
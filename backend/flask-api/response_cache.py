@@ -0,0 +1,229 @@
+"""Per-user cache of JSON read responses, with strong ETags.
+
+Responses are cached per (namespace, user, query string) and carry an ETag
+(a hash of the body), so a client polling with If-None-Match gets a 304
+without a database query while nothing has changed.
+
+Writes call :meth:`ResponseCache.invalidate` after committing. That stores a
+new random generation for each (namespace, user); entries remember the
+generation read *before* their queries ran, so a response computed from
+data older than the write is never served after it. Generations live in
+shared memory (gunicorn workers forked from a preloaded app see each
+other's writes) or, with a shared backend, in the backend, which then also
+holds the entries for every process and host. Processes that don't share a
+parent, e.g. ``uvicorn --workers``, need the shared backend.
+"""
+import hashlib
+import mmap
+import secrets
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request
+
+from compression import etag_matches
+
+CACHE_CONTROL = "private, no-cache"   # clients may keep a copy but revalidate every time
+
+
+class SharedMemoryGenerations:
+    """Generation per key in hash slots of an anonymous shared mapping.
+
+    Keys that share a slot invalidate each other, which only costs misses.
+    Slots are overwritten with random values rather than incremented, so
+    concurrent writers never need a lock.
+    """
+
+    def __init__(self, slots=65536):
+        self.slots = slots
+        self._map = mmap.mmap(-1, slots * 8)   # MAP_SHARED: inherited by forked workers
+
+    def _offset(self, key):
+        return zlib.crc32(key.encode()) % self.slots * 8
+
+    def get(self, key):
+        return struct.unpack_from("Q", self._map, self._offset(key))[0]
+
+    def bump(self, key):
+        struct.pack_into("Q", self._map, self._offset(key), secrets.randbits(64))
+
+
+class BackendGenerations:
+    """Generations stored in the shared backend, next to the entries."""
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.backend.get(f"gen:{key}")
+        return int(value) if value is not None else 0
+
+    def bump(self, key):
+        # Outlives every entry stored under the previous generation
+        self.backend.set(f"gen:{key}", str(secrets.randbits(64)).encode(), self.ttl)
+
+
+class RedisBackend:
+    """Shared backend on Redis (``pip install redis``). Any object with the
+    same ``get(key)`` / ``set(key, value, ttl)`` over bytes can be passed
+    to ResponseCache instead."""
+
+    def __init__(self, url, prefix="swastha:cache:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+
+class ResponseCache:
+    """LRU of response bodies bounded by total size, optionally in front of a shared backend."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=300, backend=None, slots=65536, on_lookup=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self.generations = BackendGenerations(backend, ttl) if backend else SharedMemoryGenerations(slots)
+        self.on_lookup = on_lookup    # on_lookup(namespace, "hit" | "not_modified" | "miss")
+        self._data = OrderedDict()    # key -> (generation, etag, body, expires)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    # ---------- entries ----------
+    def lookup(self, namespace, user, variant):
+        """``(generation, (etag, body) or None)``; store a miss under the returned generation."""
+        gen_key = f"{namespace}:{user}"
+        generation = self.generations.get(gen_key)
+        key = f"{gen_key}:{variant}"
+
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] == generation and item[3] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return generation, item[1:3]
+
+        if self.backend is not None:
+            value = self.backend.get(f"entry:{key}")
+            if value is not None:
+                header, body = value.split(b"\n", 1)
+                stored_generation, etag = header.decode().split(" ", 1)
+                if int(stored_generation) == generation:
+                    self._put(key, generation, etag, body)
+                    with self._lock:
+                        self.hits += 1
+                    return generation, (etag, body)
+
+        with self._lock:
+            self.misses += 1
+        return generation, None
+
+    def store(self, namespace, user, variant, generation, body):
+        """Cache ``body`` (bytes) and return its ETag."""
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        key = f"{namespace}:{user}:{variant}"
+        self._put(key, generation, etag, body)
+        if self.backend is not None:
+            self.backend.set(f"entry:{key}", f"{generation} {etag}\n".encode() + body, self.ttl)
+        return etag
+
+    def _put(self, key, generation, etag, body):
+        # One response may take at most an eighth of the cache
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old[2])
+            self._data[key] = (generation, etag, body, time.monotonic() + self.ttl)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted[2])
+                self.evictions += 1
+
+    def invalidate(self, user, *namespaces):
+        """Drop ``user``'s cached responses in ``namespaces``; call after the write commits."""
+        for namespace in namespaces:
+            self.generations.bump(f"{namespace}:{user}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "shared_backend": type(self.backend).__name__ if self.backend else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # ---------- HTTP ----------
+    def record(self, namespace, result):
+        if self.on_lookup is not None:
+            self.on_lookup(namespace, result)
+
+    @staticmethod
+    def respond(response, etag, if_none_match):
+        """Add ETag headers to ``response``, turning it into a 304 if the client has this version."""
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        if etag_matches(if_none_match, etag):
+            response.status_code = 304
+            response.set_data(b"")
+        return response
+
+    def cached(self, namespace, user_param="email"):
+        """Serve a GET view's 200 JSON responses from the cache, per ``request.args[user_param]``.
+
+        Other responses (errors, streams) pass through uncached.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                user = request.args.get(user_param)
+                if not user or not self.enabled:
+                    return view(*args, **kwargs)
+                variant = request_variant(request.args, user_param)
+
+                generation, hit = self.lookup(namespace, user, variant)
+                if hit is not None:
+                    etag, body = hit
+                    self.record(namespace, "not_modified" if etag_matches(request.if_none_match, etag) else "hit")
+                    response = current_app.response_class(body, mimetype="application/json")
+                    return self.respond(response, etag, request.if_none_match)
+
+                self.record(namespace, "miss")
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or response.mimetype != "application/json":
+                    return response
+                etag = self.store(namespace, user, variant, generation, response.get_data())
+                return self.respond(response, etag, request.if_none_match)
+            return wrapper
+        return decorator
+
+
+def request_variant(args, user_param):
+    # Same query in any parameter order -> same entry
+    return urlencode(sorted((k, v) for k, v in args.items(multi=True) if k != user_param))
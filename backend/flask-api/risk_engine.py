@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# numpy, pandas and joblib (which pulls in scikit-learn when unpickling) are
+# imported on first use, so importing this module costs nothing at startup.
+
+# Largest feature count we are willing to enumerate (2**16 rows ~ 512 KB)
+MAX_TABLE_BITS = 16
+
+
+class RiskEngine:
+    """Scores PCOS risk from a precomputed table of model probabilities.
+
+    Every feature in ``feature_map`` is a yes/no flag, so the whole input
+    space is ``2 ** len(feature_map)`` vectors. When the model loads we
+    score all of them once and answer requests with a single array lookup
+    on the bitmask of the flags (bit ``i`` = ``i``-th key of ``feature_map``).
+    If the loaded model does not match that binary schema, requests go to
+    the real model instead. The pickle is re-read when it changes on disk.
+    With ``lazy=True`` nothing is loaded until the first prediction (or
+    :meth:`warm_up`).
+    """
+
+    def __init__(self, model_path, feature_map, check_interval=1.0, lazy=False):
+        self.model_path = model_path
+        self.feature_map = dict(feature_map)
+        self.columns = list(self.feature_map.values())
+        self.check_interval = check_interval
+        self._weights = None
+        self._lock = threading.RLock()
+        self._state = None          # (signature, model, table)
+        self._next_check = 0.0
+        if not lazy:
+            self.reload()
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    def warm_up(self):
+        self._current()
+
+    # ---------- loading ----------
+    def _signature(self):
+        st = os.stat(self.model_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def reload(self):
+        import joblib
+        import numpy as np
+        with self._lock:
+            signature = self._signature()
+            model = joblib.load(self.model_path)
+            self._weights = 1 << np.arange(len(self.columns), dtype=np.int64)
+            table = self._build_table(model)
+            self._state = (signature, model, table)
+            self._next_check = time.monotonic() + self.check_interval
+            mode = "lookup table" if table is not None else "model fallback"
+            logger.info("Risk engine loaded %s (%s)", os.path.basename(self.model_path), mode)
+
+    def _schema_is_binary(self, model):
+        n = len(self.columns)
+        if n == 0 or n > MAX_TABLE_BITS:
+            return False
+        if not hasattr(model, "predict_proba"):
+            return False
+        if getattr(model, "n_features_in_", n) != n:
+            return False
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and set(names) != set(self.columns):
+            return False
+        return True
+
+    def _build_table(self, model):
+        import numpy as np
+        if not self._schema_is_binary(model):
+            return None
+        try:
+            combos = self.all_combinations()
+            proba = model.predict_proba(self._frame(combos, model))[:, 1]
+        except Exception:
+            logger.exception("Risk table build failed, using model directly")
+            return None
+        return np.ascontiguousarray(proba, dtype=np.float64)
+
+    def all_combinations(self):
+        import numpy as np
+        n = len(self.columns)
+        masks = np.arange(1 << n, dtype=np.int64)
+        return ((masks[:, None] >> np.arange(n)) & 1).astype(np.uint8)
+
+    def _frame(self, matrix, model):
+        import pandas as pd
+        df = pd.DataFrame(matrix, columns=self.columns)
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None:
+            df = df[list(names)]
+        return df
+
+    def _current(self):
+        if self._state is None:
+            with self._lock:    # first use: load once, other threads wait
+                if self._state is None:
+                    self.reload()
+            return self._state
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                changed = self._signature() != self._state[0]
+            except OSError:
+                changed = False     # keep serving the last good model
+            if changed:
+                try:
+                    self.reload()
+                except Exception as e:
+                    # e.g. the pickle is still being written; retry next interval
+                    logger.warning("Risk model reload failed: %s", e)
+        return self._state
+
+    # ---------- scoring ----------
+    @property
+    def model(self):
+        return self._current()[1]
+
+    @property
+    def uses_table(self):
+        return self._current()[2] is not None
+
+    def encode(self, features):
+        # Convert boolean features (0/1) to model input, in feature_map order
+        return [1 if features.get(key, 0) else 0 for key in self.feature_map]
+
+    def predict(self, features):
+        _, model, table = self._current()
+        row = self.encode(features)
+        if table is not None:
+            mask = 0
+            for i, bit in enumerate(row):
+                mask |= bit << i
+            return float(table[mask])
+        import numpy as np
+        matrix = np.array([row], dtype=np.uint8)
+        return float(model.predict_proba(self._frame(matrix, model))[0][1])
+
+    def encode_many(self, feature_dicts):
+        import numpy as np
+        return np.array([self.encode(f) for f in feature_dicts], dtype=np.uint8).reshape(-1, len(self.columns))
+
+    def predict_many(self, matrix):
+        # One vectorized lookup (or one predict_proba call) for the whole batch
+        import numpy as np
+        _, model, table = self._current()
+        matrix = np.asarray(matrix, dtype=np.uint8)
+        if len(matrix) == 0:
+            return np.empty(0, dtype=np.float64)
+        if table is not None:
+            return table[matrix.astype(np.int64) @ self._weights]
+        return model.predict_proba(self._frame(matrix, model))[:, 1]
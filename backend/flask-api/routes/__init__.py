@@ -0,0 +1,3 @@
+# Blueprint name -> routes.<name> module. Each module defines ``bp`` and may
+# define ``warm_up()`` to load what it needs before the first request.
+BLUEPRINTS = ["auth", "journal", "risk", "cycle", "recommendations", "bot", "admin"]
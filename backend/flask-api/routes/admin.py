@@ -0,0 +1,287 @@
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, jsonify, request, session
+from sqlalchemy import and_, case, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from db_pool import pool_stats
+from extensions import db, read_bind
+from models import Analytics, AnalyticsDaily, Feedback, User
+from services import analytics_buffer, enqueue_email, outbox, purger
+
+bp = Blueprint('admin', __name__)
+
+# ------------------- FEEDBACK --------------------
+FEEDBACK_INBOX = 'swasthayourpeeceesakhi@gmail.com'
+
+def feedback_email(email, rating, comment):
+    return {"subject": 'New Feedback Received', "recipients": [FEEDBACK_INBOX], "reply_to": email, "body": f"""
+New feedback received:
+
+📧 From: {email}
+⭐ Rating: {rating}
+📝 Feedback: {comment if comment else 'No comment provided'}
+"""}
+
+@bp.route('/api/feedback', methods=['POST'])
+def submit_feedback():
+    try:
+        data = request.json
+        email = data.get('email')
+        rating = data.get('rating')
+        comment = data.get('comment', '').strip()
+
+        if not rating or rating == 0:
+            return jsonify({'message': 'Rating is required'}), 400
+
+        feedback = Feedback(user_email=email, rating=rating, comment=comment)
+        db.session.add(feedback)
+
+        # Feedback and its notification email are saved together
+        enqueue_email(**feedback_email(email, rating, comment))
+        db.session.commit()
+        outbox.notify()
+
+        return jsonify({'message': 'Feedback submitted and email sent successfully'}), 200
+
+    except Exception as e:
+        print(f"Error in submit_feedback: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# -------------------- ADMIN ---------------------
+@bp.route('/api/track-visit', methods=['POST'])
+def track_visit():
+    analytics_buffer.record('visit')
+    return jsonify({"message": "Visit tracked"}), 200
+
+# Load admin credentials from env
+ADMIN_EMAIL = os.getenv("ADMIN_EMAIL")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+
+@bp.route('/api/admin-login', methods=['POST'])
+def admin_login():
+    data = request.json
+    email = data.get('email')
+    password = data.get('password')
+
+    if email == ADMIN_EMAIL and password == ADMIN_PASSWORD:
+        session['admin'] = True
+        return jsonify({"message": "Admin logged in successfully"}), 200
+    return jsonify({"error": "Invalid credentials"}), 401
+
+@bp.route('/api/logout', methods=['POST'])
+def logout():
+    session.clear()  # Clears admin session
+    return jsonify({"message": "Logged out successfully"}), 200
+
+# Days newer than this may still receive events, so they are read from raw rows
+ANALYTICS_ROLLUP_GRACE = timedelta(minutes=int(os.getenv("ANALYTICS_ROLLUP_GRACE_MINUTES", "60")))
+
+ANALYTICS_TYPES = ('visit', 'login')
+
+def _day_start(d):
+    return datetime.combine(d, datetime.min.time())
+
+def _as_date(value):
+    # DATE() comes back as a string on SQLite and a date on MySQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def refresh_analytics_rollup():
+    """Roll complete days into AnalyticsDaily; returns the first day not rolled up."""
+    cutoff = (datetime.utcnow() - ANALYTICS_ROLLUP_GRACE).date()
+
+    last_day = db.session.query(func.max(AnalyticsDaily.day)).scalar()
+    if last_day is not None:
+        from_day = _as_date(last_day) + timedelta(days=1)
+    else:
+        first_ts = db.session.query(func.min(Analytics.timestamp)).scalar()
+        if first_ts is None:
+            return cutoff
+        from_day = first_ts.date()
+    if from_day >= cutoff:
+        return cutoff
+
+    day = func.date(Analytics.timestamp)
+    rows = (db.session.query(day, Analytics.type, func.count(Analytics.id))
+            .filter(Analytics.timestamp >= _day_start(from_day),
+                    Analytics.timestamp < _day_start(cutoff))
+            .group_by(day, Analytics.type)
+            .all())
+    if rows:
+        try:
+            db.session.execute(insert(AnalyticsDaily), [
+                {"day": _as_date(d), "type": t, "count": n} for d, t, n in rows
+            ])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # another worker rolled these days up first
+    return cutoff
+
+def analytics_rollup_select(edges, first_day, rolled_until, split_days):
+    # Whole days in [first_day, rolled_until) outside split_days, summed per type and bucket
+    bucket = case(*[(AnalyticsDaily.day < e.date(), i) for i, e in enumerate(edges[1:])],
+                  else_=len(edges) - 1).label("bucket")
+    return (select(AnalyticsDaily.type, bucket, func.sum(AnalyticsDaily.count))
+            .where(AnalyticsDaily.day >= first_day,
+                   AnalyticsDaily.day < rolled_until,
+                   AnalyticsDaily.day.notin_(split_days),
+                   AnalyticsDaily.type.in_(ANALYTICS_TYPES))
+            .group_by(AnalyticsDaily.type, "bucket"))
+
+def analytics_raw_select(edges, raw_ranges):
+    # Raw rows since edges[0] within raw_ranges, counted per type and bucket
+    bucket = case(*[(Analytics.timestamp < e, i) for i, e in enumerate(edges[1:])],
+                  else_=len(edges) - 1).label("bucket")
+    return (select(Analytics.type, bucket, func.count(Analytics.id))
+            .where(Analytics.timestamp >= edges[0],
+                   Analytics.type.in_(ANALYTICS_TYPES),
+                   or_(*raw_ranges))
+            .group_by(Analytics.type, "bucket"))
+
+def analytics_bucket_counts(edges):
+    """Visit/login counts per bucket [edges[i], edges[i+1]); the last bucket is open-ended."""
+    counts = {t: [0] * len(edges) for t in ANALYTICS_TYPES}
+    start_date = edges[0]
+    rolled_until = refresh_analytics_rollup()
+
+    # Counts are read from the replica (if any), which may not have the newest
+    # rollup rows yet; days it lacks are grouped from raw rows there instead
+    read = read_bind()
+    replica_last = db.session.execute(select(func.max(AnalyticsDaily.day)), bind_arguments=read).scalar()
+    if replica_last is None:
+        rolled_until = min(rolled_until, start_date.date())
+    else:
+        rolled_until = min(rolled_until, _as_date(replica_last) + timedelta(days=1))
+
+    # Days cut by a bucket edge can't be taken from the daily rollup
+    split_days = {e.date() for e in edges if e != _day_start(e.date())}
+
+    # Whole days come from the rollup ...
+    first_day = start_date.date()
+    if start_date != _day_start(first_day):
+        first_day += timedelta(days=1)
+    if first_day < rolled_until:
+        rows = db.session.execute(analytics_rollup_select(edges, first_day, rolled_until, split_days),
+                                  bind_arguments=read)
+        for type_, i, n in rows:
+            counts[type_][i] += int(n)
+
+    # ... split days and days not rolled up yet are grouped from raw rows
+    raw_ranges = [Analytics.timestamp >= max(start_date, _day_start(rolled_until))]
+    for d in split_days:
+        if d < rolled_until:
+            raw_ranges.append(and_(Analytics.timestamp >= _day_start(d),
+                                   Analytics.timestamp < _day_start(d + timedelta(days=1))))
+    rows = db.session.execute(analytics_raw_select(edges, raw_ranges), bind_arguments=read)
+    for type_, i, n in rows:
+        counts[type_][i] += n
+    return counts
+
+@bp.route('/api/admin-analytics', methods=['GET'])
+def admin_analytics():
+    if not session.get('admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    filter_range = request.args.get('range', '30days')
+    now = datetime.utcnow()
+
+    if filter_range == 'week':
+        start_date = now - timedelta(days=7)
+    elif filter_range == '30days':
+        start_date = now - timedelta(days=30)
+    elif filter_range == '3months':
+        start_date = now - timedelta(days=90)
+    elif filter_range == 'year':
+        start_date = now - timedelta(days=365)
+    else:
+        start_date = now - timedelta(days=30)
+
+    # Registered Users
+    total_users = db.session.execute(select(func.count()).select_from(User), bind_arguments=read_bind()).scalar()
+
+    # Visit/login counts are bucketed in the database; edges[i] starts bucket i
+    grouped_data = OrderedDict()
+
+    if filter_range == 'week':
+        labels = [(now - timedelta(days=i)).strftime("%a") for i in range(6, -1, -1)]
+        labels.reverse()
+        for label in labels:
+            grouped_data[label] = {"visitors": 0, "logins": 0}
+
+        # One bucket per calendar day (the partial first day shares today's weekday)
+        edges = [start_date] + [_day_start(now.date() - timedelta(days=i)) for i in range(6, -1, -1)]
+        bucket_labels = [e.strftime("%a") for e in edges]
+
+    elif filter_range == '30days':
+        num_weeks = 4
+        for i in range(1, num_weeks + 1):
+            grouped_data[f"Week {i}"] = {"visitors": 0, "logins": 0}
+
+        # Days 28-30 fall into a fifth bucket that only counts towards totals
+        edges = [start_date + timedelta(days=7 * i) for i in range(num_weeks + 1)]
+        bucket_labels = [f"Week {i}" for i in range(1, num_weeks + 2)]
+
+    elif filter_range in ['3months', 'year']:
+        from dateutil.relativedelta import relativedelta
+        num_months = 3 if filter_range == '3months' else 12
+        # Create correct month labels using relativedelta
+        for i in range(num_months):
+            month_date = now - relativedelta(months=i)
+            month_label = month_date.strftime("%b")
+            grouped_data[month_label] = {"visitors": 0, "logins": 0}
+
+        # Reverse to get oldest → newest
+        grouped_data = OrderedDict(reversed(list(grouped_data.items())))
+
+        # One bucket per calendar month since start_date
+        edges = [start_date]
+        month_start = _day_start(start_date.date().replace(day=1))
+        while True:
+            month_start += relativedelta(months=1)
+            if month_start > now:
+                break
+            edges.append(month_start)
+        bucket_labels = [e.strftime("%b") for e in edges]
+
+    else:
+        edges = [start_date, now]
+        bucket_labels = [None, None]
+
+    counts = analytics_bucket_counts(edges)
+    for i, label in enumerate(bucket_labels):
+        if label in grouped_data:
+            grouped_data[label]["visitors"] += counts['visit'][i] + counts['login'][i]
+            grouped_data[label]["logins"] += counts['login'][i]
+
+    total_logins = sum(counts['login'])
+    total_visitors = sum(counts['visit']) + total_logins
+
+    # Convert grouped data to list for chart
+    chart_data = [{"date": k, "visitors": v["visitors"], "logins": v["logins"]} for k, v in grouped_data.items()]
+
+    return jsonify({
+        "chart_data": chart_data,
+        "visitors": total_visitors,
+        "logins": total_logins,
+        "registered_users": total_users
+    }), 200
+
+@bp.route('/api/admin-analytics/buffer', methods=['GET'])
+def admin_analytics_buffer():
+    if not session.get('admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(analytics_buffer.stats()), 200
+
+@bp.route('/api/admin-analytics/db', methods=['GET'])
+def admin_analytics_db():
+    if not session.get('admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({bind or "primary": pool_stats(engine) for bind, engine in db.engines.items()}), 200
+
+@bp.route('/api/admin-analytics/purges', methods=['GET'])
+def admin_analytics_purges():
+    if not session.get('admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify(purger.stats()), 200
@@ -0,0 +1,253 @@
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
+
+from account_export import ndjson_stream, zip_stream
+from extensions import db
+from hashing import HashingBusy
+from models import AccountPurge, JournalStats, User
+from services import (CACHED_PER_USER, analytics_buffer, enqueue_email, hasher, is_valid_email, outbox, purger,
+                      response_cache)
+
+bp = Blueprint('auth', __name__)
+
+# Token Serializer
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+
+@bp.app_errorhandler(HashingBusy)
+def hashing_busy(e):
+    return jsonify({'message': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
+
+# Auth Routes
+@bp.route('/api/check-email', methods=['POST'])
+def check_email():
+    data = request.json
+    email = data.get('email')
+    if not email or not is_valid_email(email):
+        return jsonify({'message': 'Invalid email format'}), 400
+
+    exists = User.query.filter_by(email=email).first()
+    if exists:
+        return jsonify({'message': 'Email exists'}), 200
+    return jsonify({'message': 'Email not found'}), 404
+
+#-------------------------REGISTER--------------------------
+@bp.route('/api/register', methods=['POST'])
+def register():
+    data = request.json
+    name = data.get('name')
+    email = data.get('email')
+    password = data.get('password')
+
+    if not name or not email or not password:
+        return jsonify({'message': 'All fields required'}), 400
+    if not is_valid_email(email
+                          ):
+        return jsonify({'message': 'Invalid email format'}), 400
+    if User.query.filter_by(email=email).first():
+        return jsonify({'message': 'Email already exists'}), 409
+    # A new account must not inherit rows a purge has not reached yet
+    if AccountPurge.query.filter(AccountPurge.email == email, AccountPurge.status != 'done').first():
+        return jsonify({'message': 'This account is still being deleted, please try again later'}), 409
+
+    hashed_password = hasher.hash(password)
+    user = User(name=name, email=email, password=hashed_password)
+    db.session.add(user)
+    db.session.commit()
+
+    # Track visit for registration page
+    analytics_buffer.record('visit')
+
+    # Queue welcome email
+    try:
+        enqueue_email('Welcome to Swastha 💚', [email], f"""
+Hi {name},
+
+🌸 Welcome to Swastha – Your PeeCeeSakhi! 🌸
+
+We’re so happy to have you join our caring and supportive community, built especially to help women like you manage and embrace their PCOS journey with confidence, clarity, and compassion.
+
+            Here’s what you can look forward to:
+            💡 Track your symptoms, cycles, and moods
+            📔 Maintain your wellness journal
+            🧘‍♀️ Get personalized tips
+            🌼 Understand your body better – because knowledge is power!
+            🫶 And most importantly, never feel alone again on this path
+
+            ✨ Your health journey matters – and we're here for every step.
+
+            With love and support,
+            The Swastha Team 💚
+
+            ---
+            (If you did not register for Swastha, please ignore this email.)
+""")
+        db.session.commit()
+        outbox.notify()
+    except Exception as e:
+        db.session.rollback()
+        print("Email queueing failed:", e)
+        return jsonify({'message': 'User saved, but email failed'}), 201
+
+    return jsonify({'message': 'User registered and email sent!'}), 201
+
+#------------------------LOGIN----------------------
+@bp.route('/api/login', methods=['POST'])
+def login():
+    data = request.json
+    email = data.get('email')
+    password = data.get('password')
+
+    user = User.query.filter_by(email=email).first()
+    if not user or not hasher.verify(user.password, password):
+        return jsonify({'message': 'Invalid credentials'}), 401
+
+    # Upgrade hashes made with older parameters while we have the password
+    if hasher.needs_rehash(user.password):
+        try:
+            user.password = hasher.hash(password)
+            db.session.commit()
+        except HashingBusy:
+            pass  # try again on a later login
+
+    # Track login
+    analytics_buffer.record('login')
+
+    return jsonify({'message': 'Login successful', 'user': {'name': user.name, 'email': user.email}}), 200
+
+# ------------------- PASSWORD RESET ----------------------
+@bp.route('/api/send-reset-link', methods=['POST'])
+def send_reset_link():
+    data = request.json
+    email = data.get('email')
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'message': 'Email not found'}), 404
+
+    try:
+        enqueue_email(**reset_email(user.name, email))
+        db.session.commit()
+        outbox.notify()
+    except Exception as e:
+        db.session.rollback()
+        print("Email queueing failed:", str(e))
+        return jsonify({'message': 'Failed to send email', 'error': str(e)}), 500
+
+    return jsonify({'message': 'Reset link sent to your email'}), 200
+
+def reset_email(name, email):
+    token = _serializer().dumps(email, salt='password-reset-salt')
+    reset_url = f"http://localhost:3000/reset/{token}"
+    return {"subject": 'Reset Your Password', "recipients": [email], "body": f"""
+Hello {name},
+
+Click the link below to reset your password:
+{reset_url}
+
+If you did not request this, please ignore this email.
+"""}
+
+@bp.route('/api/reset-password/<token>', methods=['POST'])
+def reset_password(token):
+    try:
+        email = _serializer().loads(token, salt='password-reset-salt', max_age=1800)
+    except SignatureExpired:
+        return jsonify({'message': 'Token expired'}), 400
+    except BadSignature:
+        return jsonify({'message': 'Invalid token'}), 400
+
+    data = request.json
+    new_password = data.get('password')
+
+    if not new_password:
+        return jsonify({'message': 'Password required'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    user.password = hasher.hash(new_password)
+    db.session.commit()
+    response_cache.invalidate(email, "profile")
+
+    return jsonify({'message': 'Password updated successfully'}), 200
+
+# ----------------------- PROFILE -------------------------
+@bp.route('/api/profile', methods=['GET'])
+@response_cache.cached("profile")
+def get_profile():
+    email = request.args.get('email')
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+    return jsonify({'name': user.name, 'email': user.email}), 200
+
+# ----------------------- DATA EXPORT -----------------------
+EXPORT_FORMATS = {
+    "zip": (zip_stream, "application/zip"),
+    "ndjson": (ndjson_stream, "application/x-ndjson"),
+}
+
+@bp.route('/api/export', methods=['POST'])
+def export_account():
+    """All of an account's data as a download: {"email", "password", "format": "zip" | "ndjson"}."""
+    data = request.json
+    email = data.get('email')
+    password = data.get('password')
+    fmt = data.get('format', 'zip')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': 'format must be zip or ndjson'}), 400
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+    if not hasher.verify(user.password, password):
+        return jsonify({'message': 'Incorrect password'}), 401
+
+    stream, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"swastha-export-{datetime.utcnow():%Y%m%d}.{fmt}"
+    return Response(stream_with_context(stream(email, current_app.json.dumps)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# --------------------- ACCOUNT DELETION --------------------
+@bp.route('/api/delete-account', methods=['POST'])
+def delete_account():
+    data = request.json
+    email = data.get('email')
+    password = data.get('password')
+
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    if not hasher.verify(user.password, password):
+        return jsonify({'message': 'Incorrect password'}), 401
+
+    try:
+        # The account goes now; its journal, cycles, risk results and feedback
+        # are deleted in batches by the purger (services.purger)
+        purge = AccountPurge(token=uuid.uuid4().hex, email=email, progress={})
+        JournalStats.query.filter_by(user_id=email).delete()    # Journal aggregates
+        db.session.delete(user)
+        db.session.add(purge)
+        db.session.commit()
+        response_cache.invalidate(email, *CACHED_PER_USER)
+        purger.notify()
+
+        return jsonify({'message': 'Account deleted, related data is being removed',
+                        'purge_id': purge.token}), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to delete account: {str(e)}'}), 500
+
+@bp.route('/api/delete-account/<token>', methods=['GET'])
+def delete_account_status(token):
+    purge = AccountPurge.query.filter_by(token=token).first()
+    if not purge:
+        return jsonify({'message': 'Unknown deletion'}), 404
+    return jsonify(purger.status(purge)), 200
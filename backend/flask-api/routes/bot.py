@@ -0,0 +1,120 @@
+import json
+import os
+
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
+
+from bot_service import (BotService, CircuitBreaker, ConversationStore, FakeGeminiClient, LazyClient, ResponseCache,
+                         SqlBackend)
+from extensions import db
+from metrics import GEMINI_SECONDS
+from models import BotConversation
+from response_cache import RedisBackend
+
+bp = Blueprint('bot', __name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+def _gemini_client():
+    # GEMINI_FAKE=1 answers locally (development, benchmarks) instead of calling Gemini
+    if os.getenv("GEMINI_FAKE") == "1":
+        return FakeGeminiClient(delay=float(os.getenv("GEMINI_FAKE_DELAY", "0")))
+    from google import genai
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+# Created on the first bot question, not at import
+client = LazyClient(_gemini_client)
+
+# Identical questions ("what is PCOS?") are answered from an LRU cache.
+# Gemini calls are capped, time-limited and behind a circuit breaker so a
+# slow upstream can't tie up every worker.
+bot = BotService(
+    client, MODEL_NAME,
+    cache=ResponseCache(
+        max_entries=int(os.getenv("BOT_CACHE_SIZE", "256")),
+        ttl=int(os.getenv("BOT_CACHE_TTL", "3600"))
+    ),
+    max_in_flight=int(os.getenv("BOT_MAX_IN_FLIGHT", "4")),
+    queue_timeout=float(os.getenv("BOT_QUEUE_TIMEOUT", "2")),
+    timeout=float(os.getenv("BOT_TIMEOUT", "20")),
+    slow_call=float(os.getenv("BOT_SLOW_CALL", "15")),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv("BOT_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("BOT_BREAKER_RESET", "30"))
+    ),
+    on_upstream=lambda seconds, ok: GEMINI_SECONDS.observe(seconds, outcome="ok" if ok else "error")
+)
+
+def _conversation_backend():
+    # Shared by every worker: Redis when the response cache has it, else a
+    # database table. BOT_CONVERSATION_STORE=memory keeps them per process,
+    # which needs sticky routing of a conversation to one worker.
+    store = os.getenv("BOT_CONVERSATION_STORE", "shared")
+    if store == "memory":
+        return None
+    if store != "shared":
+        raise ValueError(f"Unknown BOT_CONVERSATION_STORE: {store}")
+    if os.getenv("RESPONSE_CACHE_URL"):
+        return RedisBackend(os.environ["RESPONSE_CACHE_URL"], prefix="swastha:")
+    return SqlBackend(db, BotConversation)
+
+# Follow-up questions keep context: recent turns verbatim, older ones summarised
+conversations = ConversationStore(
+    max_sessions=int(os.getenv("BOT_MAX_CONVERSATIONS", "1000")),
+    ttl=int(os.getenv("BOT_CONVERSATION_TTL", "1800")),
+    history_tokens=int(os.getenv("BOT_HISTORY_TOKENS", "1500")),
+    summary_tokens=int(os.getenv("BOT_SUMMARY_TOKENS", "300")),
+    backend=_conversation_backend()
+)
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@bp.route("/pcos-bot", methods=["POST"])
+def pcos_bot():
+    try:
+        data = request.json or {}
+        user_message = data.get("message")
+        if not user_message:
+            return jsonify({"error": "No message provided"}), 400
+
+        conversation_id, history, restarted = conversations.open(data.get("conversation_id"))
+
+        # Server-Sent Events: {"stream": true} or Accept: text/event-stream
+        if data.get("stream") or request.accept_mimetypes.best == "text/event-stream":
+            def generate():
+                def remember(reply):
+                    conversations.add_turn(conversation_id, user_message, reply)
+                try:
+                    for text in bot.stream(user_message, history, on_reply=remember):
+                        yield _sse("message", {"text": text})
+                    yield _sse("done", {"conversation_id": conversation_id, "restarted": restarted})
+                except Exception as e:
+                    yield _sse("error", {"error": str(e)})
+
+            return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        reply, source = bot.reply(user_message, history)
+        if source != "fallback":
+            conversations.add_turn(conversation_id, user_message, reply)
+        return jsonify({
+            "reply": reply,
+            "cached": source == "cache",
+            "degraded": source == "fallback",
+            "conversation_id": conversation_id,
+            "restarted": restarted      # the conversation_id sent was unknown or expired
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/admin-analytics/bot', methods=['GET'])
+def admin_bot_stats():
+    if not session.get('admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+    stats = bot.stats()
+    stats["conversations"] = conversations.stats()
+    return jsonify(stats), 200
+
+def warm_up():
+    client.get()
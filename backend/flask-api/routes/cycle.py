@@ -0,0 +1,102 @@
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import select
+
+from cycle_forecast import MAX_FORECAST_CYCLES, PERIOD_DAYS, cycle_stats, entry_phases, forecast
+from extensions import db
+from models import CycleEntry
+from services import response_cache
+
+bp = Blueprint('cycle', __name__)
+
+@bp.route('/api/cycle', methods=['POST'])
+def add_cycle():
+    try:
+        data = request.json
+        email = data.get("email")
+        period_date_str = data.get("period_date")
+
+        if not email or not period_date_str:
+            return jsonify({"error": "Missing email or period_date"}), 400
+
+        period_date = datetime.strptime(period_date_str, "%Y-%m-%d").date()
+
+        # Predictions use the cycle length (and its spread) from all of the user's periods
+        history = db.session.execute(
+            select(CycleEntry.period_date).where(CycleEntry.user_email == email)).scalars().all()
+        _, length, std, _ = cycle_stats(history + [period_date])
+        phases = entry_phases(period_date, length, std)
+
+        new_entry = CycleEntry(
+            user_email=email,
+            period_date=period_date,
+            ovulation_date=date.fromisoformat(phases["ovulation"]),
+            fertile_start=date.fromisoformat(phases["fertile_window"][0]),
+            fertile_end=date.fromisoformat(phases["fertile_window"][1]),
+            next_period_start=date.fromisoformat(phases["next_period"][0]),
+            next_period_end=date.fromisoformat(phases["next_period"][1]),
+        )
+
+        db.session.add(new_entry)
+        db.session.commit()
+        response_cache.invalidate(email, "cycle")
+
+        return jsonify({
+            "message": "Cycle added successfully",
+            "phases": phases
+        }), 200
+
+    except Exception as e:
+        current_app.logger.exception("Failed to add cycle")
+        return jsonify({"error": str(e)}), 500
+
+
+def recent_cycles_select(email):
+    # Phases were predicted when each period was logged; read them back as stored
+    return (select(CycleEntry.period_date, CycleEntry.ovulation_date,
+                   CycleEntry.fertile_start, CycleEntry.fertile_end,
+                   CycleEntry.next_period_start, CycleEntry.next_period_end)
+            .where(CycleEntry.user_email == email)
+            .order_by(CycleEntry.created_at.desc())
+            .limit(3))
+
+def format_cycles(rows):
+    # Dates as they come from the database; the JSON provider writes them as ISO 8601
+    return [{
+        "period_date": row.period_date,
+        "phases": {
+            "period": [row.period_date, row.period_date + timedelta(days=PERIOD_DAYS - 1)],
+            "fertile_window": [row.fertile_start, row.fertile_end],
+            "ovulation": row.ovulation_date,
+            "next_period": [row.next_period_start, row.next_period_end],
+        }
+    } for row in rows]
+
+@bp.route('/api/cycle', methods=['GET'])
+@response_cache.cached("cycle")
+def get_cycles():
+    try:
+        email = request.args.get("email")
+        if not email:
+            return jsonify({"error": "Missing email"}), 400
+
+        rows = db.session.execute(recent_cycles_select(email))
+        return jsonify(format_cycles(rows)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/cycle/forecast', methods=['GET'])
+def get_forecast():
+    """Estimated cycle length and the next ``cycles`` (default 3) periods with 80% windows."""
+    email = request.args.get("email")
+    if not email:
+        return jsonify({"error": "Missing email"}), 400
+    cycles = request.args.get("cycles", 3, type=int)
+    if not 1 <= cycles <= MAX_FORECAST_CYCLES:
+        return jsonify({"error": f"cycles must be between 1 and {MAX_FORECAST_CYCLES}"}), 400
+
+    period_dates = db.session.execute(
+        select(CycleEntry.period_date).where(CycleEntry.user_email == email)).scalars().all()
+    return jsonify(forecast(period_dates, cycles)), 200
@@ -0,0 +1,155 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import select
+
+from extensions import db, read_bind
+from journal_stats import update_journal_stats
+from models import Entry
+from services import journal_search, response_cache
+
+bp = Blueprint('journal', __name__)
+
+ENTRY_FIELDS = ["id", "age", "weight", "cycle", "date", "mood", "entry"]
+ENTRIES_DEFAULT_PAGE = 50
+ENTRIES_MAX_PAGE = 200
+
+def parse_entries_args(args):
+    """Validate GET /api/entries query params; returns (options, error message)."""
+    user_id = args.get('user_id')
+    if not user_id:
+        return None, "Missing user_id"
+
+    fields = ENTRY_FIELDS
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = set(fields) - set(ENTRY_FIELDS)
+        if unknown:
+            return None, f"Unknown fields: {', '.join(sorted(unknown))}"
+        if "id" not in fields:
+            fields = ["id"] + fields
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return None, "order must be asc or desc"
+
+    limit = args.get('limit', type=int)
+    cursor = args.get('cursor', type=int)
+    if cursor is not None and limit is None:
+        limit = ENTRIES_DEFAULT_PAGE
+    if limit is not None and limit < 1:
+        return None, "limit must be positive"
+    if limit is not None:
+        limit = min(limit, ENTRIES_MAX_PAGE)
+
+    return {"user_id": user_id, "fields": fields, "order": order, "limit": limit,
+            "cursor": cursor, "ndjson": args.get('format') == 'ndjson'}, None
+
+def entries_select(opts, limit=None):
+    # Only the requested columns are loaded, walking the (user_id, id) index
+    stmt = select(*[getattr(Entry, f) for f in opts["fields"]]).where(Entry.user_id == opts["user_id"])
+    cursor = opts["cursor"]
+    if opts["order"] == 'desc':
+        if cursor is not None:
+            stmt = stmt.where(Entry.id < cursor)
+        stmt = stmt.order_by(Entry.id.desc())
+    else:
+        if cursor is not None:
+            stmt = stmt.where(Entry.id > cursor)
+        stmt = stmt.order_by(Entry.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def entries_page(fields, rows, limit):
+    # rows holds up to limit + 1 rows; the extra one only says there is another page
+    has_more = len(rows) > limit
+    result = [dict(zip(fields, row)) for row in rows[:limit]]
+    return {
+        "entries": result,
+        "next_cursor": result[-1]["id"] if has_more else None
+    }
+
+@bp.route('/api/entries', methods=['GET'])
+@response_cache.cached("entries", user_param="user_id")
+def get_entries():
+    """Journal entries for a user.
+
+    Optional query params:
+      fields=id,date,mood      only these columns (skip the entry text in list views)
+      limit=N&cursor=<id>      keyset pages of at most ENTRIES_MAX_PAGE, with next_cursor
+      order=asc|desc           id order (default asc, the order entries were written)
+      format=ndjson            stream one JSON object per line instead of one document
+    Without limit/cursor every entry is returned, as before.
+    """
+    opts, error = parse_entries_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    fields, limit = opts["fields"], opts["limit"]
+
+    if opts["ndjson"]:
+        stmt = entries_select(opts, limit).execution_options(yield_per=500)
+
+        def generate():
+            for row in db.session.execute(stmt, bind_arguments=read_bind()):
+                yield current_app.json.dumps(dict(zip(fields, row))) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    if limit is None:
+        rows = db.session.execute(entries_select(opts), bind_arguments=read_bind())
+        return jsonify({"entries": [dict(zip(fields, row)) for row in rows]})
+
+    rows = db.session.execute(entries_select(opts, limit + 1), bind_arguments=read_bind()).all()
+    return jsonify(entries_page(fields, rows, limit))
+
+@bp.route('/api/entries', methods=['POST'])
+def add_entry():
+    data = request.json
+    required = ["user_id", "age", "weight", "cycle", "date", "mood", "entry"]
+    if not all(k in data for k in required):
+        return jsonify({"error": "Missing data"}), 400
+
+    new_entry = Entry(
+        user_id=data["user_id"],
+        age=data["age"],
+        weight=data["weight"],
+        cycle=data["cycle"],
+        date=data["date"],
+        mood=data["mood"],
+        entry=data["entry"]
+    )
+    # Once `flask ensure-indexes` has run, the search index is updated in this transaction
+    db.session.add(new_entry)
+    db.session.flush()
+    update_journal_stats(new_entry)
+    db.session.commit()
+    response_cache.invalidate(new_entry.user_id, "entries", "recommendations")
+
+    return jsonify({"message": "Entry added successfully"}), 200
+
+SEARCH_MAX_PAGE = 50
+
+@bp.route('/api/entries/search', methods=['GET'])
+def search_entries():
+    user_id = request.args.get('user_id')
+    q = (request.args.get('q') or '').strip()
+    if not user_id or not q:
+        return jsonify({"error": "Missing user_id or q"}), 400
+
+    page = request.args.get('page', 1, type=int)
+    limit = min(request.args.get('limit', 20, type=int), SEARCH_MAX_PAGE)
+    if page < 1 or limit < 1:
+        return jsonify({"error": "page and limit must be positive"}), 400
+
+    try:
+        results, total = journal_search.search(
+            user_id, q,
+            mood=request.args.get('mood'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            limit=limit,
+            offset=(page - 1) * limit
+        )
+    except Exception as e:
+        return jsonify({"error": f"Search failed: {str(e)}"}), 500
+
+    return jsonify({"results": results, "total": total, "page": page, "limit": limit})
@@ -0,0 +1,197 @@
+import random
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from journal_stats import build_journal_stats
+from models import AccountPurge, JournalStats
+from services import response_cache
+
+bp = Blueprint('recommendations', __name__)
+
+# Base tips for all users
+BASE_TIPS = {
+    "Diet": [
+        "🥗 Eat colorful fruits and veggies daily",
+        "🍳 Include protein-rich foods in breakfast",
+        "💧 Drink 6-8 glasses of water",
+        "🥑 Add healthy fats like avocado and nuts",
+        "🍞 Prefer whole grains over refined carbs",
+        "🍵 Reduce sugary drinks and snacks"
+    ],
+    "Better Mood": [
+        "😌 Practice mindfulness or meditation 10 mins daily",
+        "🎵 Listen to your favorite music to uplift mood",
+        "🚶‍♀️ Take short walks in nature",
+        "📔 Maintain a gratitude journal",
+        "🤝 Connect with loved ones often"
+    ],
+    "Care Yourself": [
+        "🛀 Take relaxing baths or self-care routines",
+        "🧘‍♀️ Do gentle stretches or yoga",
+        "💧 Keep yourself hydrated",
+        "📅 Plan breaks to avoid overworking",
+        "🌸 Practice deep breathing when stressed"
+    ],
+    "PCOS Care": [
+        "📊 Track your period cycle regularly",
+        "🩺 Consult a specialist if cycles are irregular",
+        "🏃‍♀️ Do regular cardio or yoga exercises",
+        "⚖️ Maintain a healthy weight and BMI"
+    ],
+    "Hormone Balance": [
+        "🛌 Maintain a consistent sleep schedule",
+        "🧘‍♀️ Practice stress-relief techniques",
+        "🥦 Eat foods rich in zinc, magnesium, and vitamin D",
+        "🏋️ Exercise regularly"
+    ]
+}
+
+def load_journal_stats(email):
+    # Running journal aggregates: one row instead of the whole history
+    stats = db.session.get(JournalStats, email)
+    if stats is None:
+        # A deleted account's entries are half gone while its purge runs; don't
+        # rebuild (and save) stats from them
+        if AccountPurge.query.filter(AccountPurge.email == email, AccountPurge.status != 'done').first():
+            return JournalStats(user_id=email, mood_sum=0, mood_count=0)
+        stats = build_journal_stats(email)
+        if stats.mood_count:
+            try:
+                db.session.add(stats)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+    return stats
+
+def recommendations_for(stats):
+    """Personalised tips from a user's JournalStats."""
+    # Last cycle (only last valid)
+    last_cycle = stats.last_cycle
+    last_cycles_list = [last_cycle] if last_cycle is not None else ["No data"]
+
+    # Mood Analysis
+    total_score, count = stats.mood_sum, stats.mood_count
+
+    if count > 0:
+        avg_mood = total_score / count
+        if avg_mood >= 4.5:
+            overall_mood = "Happy"
+        elif avg_mood >= 3.5:
+            overall_mood = "Average"
+        elif avg_mood >= 2.5:
+            overall_mood = "Low"
+        elif avg_mood >= 1.5:
+            overall_mood = "Sad"
+        else:
+            overall_mood = "Very Low"
+    else:
+        overall_mood = "No Data"
+
+    # Initialize recommendations with empty lists
+    tips = {k: [] for k in BASE_TIPS.keys()}
+
+    # Mood-based adjustments
+    if overall_mood == "Happy":
+        tips["Better Mood"].extend([
+            "🌟 Keep enjoying your happy moments!",
+            "😊 Share your happiness with friends or family.",
+            "🎵 Listen to uplifting music or podcasts.",
+            "📔 Continue journaling to reflect on positive experiences.",
+            "🚶‍♀️ Take short walks or outdoor activities to maintain energy.",
+            "🎨 Engage in hobbies that make you feel even happier."
+        ])
+        tips["Care Yourself"].extend([
+            "💫 Maintain your healthy habits",
+            "🛀 Take relaxing baths or self-care breaks",
+            "🧘‍♀️ Continue yoga or gentle stretches",
+            "💧 Stay hydrated and eat nourishing meals",
+            "🌸 Practice gratitude or mindfulness exercises"
+        ])
+
+    elif overall_mood == "Average":
+        tips["Better Mood"].extend([
+            "😊 Light exercise or hobbies can boost mood",
+            "🎵 Listen to music to lift your spirits",
+            "📔 Reflect on small positive moments in a journal",
+            "🚶‍♀️ Take short walks or spend time outdoors"
+        ])
+        tips["Care Yourself"].extend([
+            "🌿 Take short breaks to refresh",
+            "🛀 Treat yourself to something relaxing",
+            "💧 Maintain hydration and balanced meals",
+            "🧘‍♀️ Try gentle stretches or meditation"
+        ])
+
+    elif overall_mood in ["Low", "Sad", "Very Low"]:
+        tips["Better Mood"].extend([
+            "🕯 Try journaling or meditation to uplift mood",
+            "🤝 Connect with friends or loved ones for support",
+            "🎵 Listen to calming music or podcasts",
+            "🚶‍♀️ Go for a short walk or light activity",
+            "📔 Write down small things that made you smile"
+        ])
+        tips["Care Yourself"].extend([
+            "💖 Schedule 'me-time' daily",
+            "🛀 Take relaxing baths or soothing routines",
+            "💧 Drink enough water and eat healthy meals",
+            "🧘‍♀️ Try gentle yoga or breathing exercises",
+            "🌸 Practice mindfulness or gratitude exercises"
+        ])
+
+    # Cycle-based adjustments
+    if last_cycle is not None:
+        if 28 <= last_cycle <= 30:
+            tips["PCOS Care"].extend([
+                "✅ Your cycle is regular. Keep tracking and maintaining healthy habits.",
+                "💪 Continue your exercise and balanced diet routines.",
+                "📔 Keep journaling to maintain awareness of your cycle."
+            ])
+        else:
+            tips["Diet"].extend([
+                "🍲 Include foods to help regulate your menstrual cycle",
+                "🥦 Eat zinc, magnesium, and iron-rich foods",
+                "💧 Stay well hydrated and reduce sugary snacks"
+            ])
+            tips["PCOS Care"].extend([
+                "⚠️ Your cycle seems irregular. Consider yoga, exercise, and consult a doctor if needed",
+                "📅 Track your periods closely for patterns",
+                "🧘‍♀️ Try stress-relief routines like meditation or breathing exercises"
+            ])
+            tips["Hormone Balance"].extend([
+                "😌 Practice stress-relief daily",
+                "🛌 Maintain consistent sleep schedules",
+                "🏋️ Include light physical activity to support hormonal balance"
+            ])
+
+    #  if any category is empty, use base tips for that category
+    for k in tips.keys():
+        if not tips[k]:
+            tips[k] = BASE_TIPS[k][:]  # copy of base tips
+
+    # Shuffle each category and limit to 6 tips
+    for k in tips:
+        random.shuffle(tips[k])
+        tips[k] = tips[k][:6]
+
+    return {
+        "overall_mood": overall_mood,
+        "recommendations": tips,
+        "last_cycles": last_cycles_list
+    }
+
+@bp.route("/api/recommendations", methods=["GET"])
+@response_cache.cached("recommendations")
+def get_recommendations():
+    email = request.args.get("email")
+
+    # If user is not logged in, show only base tips
+    if not email:
+        return jsonify({
+            "overall_mood": "No Data",
+            "recommendations": BASE_TIPS,
+            "last_cycles": ["No data"]
+        })
+
+    return jsonify(recommendations_for(load_journal_stats(email)))
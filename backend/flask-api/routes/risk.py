@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import insert
+
+from extensions import db
+from metrics import MODEL_INFERENCE_SECONDS
+from models import PcosRiskEntry
+from risk_engine import RiskEngine
+
+bp = Blueprint('risk', __name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Map frontend keys → model features
+RISK_FEATURE_MAP = {
+    "cycle_irregularity": "Cycle_Delay",
+    "acne": "Acne",
+    "hair_growth": "Excessive_Hair_Growth",
+    "hair_loss": "Scalp_Hair_Loss",
+    "skin_darkening": "Dark_Skin_Patches",
+    "weight_gain": "Weight_Gain",
+    "pain": "Pain"
+}
+
+# All 128 answers are scored once at load; requests are a table lookup.
+# The model (and numpy/pandas/scikit-learn) loads on the first prediction.
+risk_engine = RiskEngine(os.path.join(BASE_DIR, "pcos_model.pkl"), RISK_FEATURE_MAP, lazy=True)
+
+@bp.route("/api/risk-prediction", methods=["POST"])
+def predict():
+    data = request.json
+    features = data.get("features", {})
+    email = data.get("email")
+
+    if not email:
+        return jsonify({"error": "Email is required"}), 400
+    if not features or not isinstance(features, dict):
+        return jsonify({"error": "Invalid or missing features"}), 400
+
+    # Predict probability of PCOS
+    try:
+        with MODEL_INFERENCE_SECONDS.time(kind="single"):
+            prob = risk_engine.predict(features)
+        risk_percent = round(prob * 100, 2)
+    except Exception as e:
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
+    # Save to DB
+    try:
+        new_entry = PcosRiskEntry(email=email, risk_score=risk_percent)
+        db.session.add(new_entry)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    return jsonify({"ML Predicted Risk (%)": risk_percent})
+
+# Partner clinics upload screenings in bulk
+RISK_BATCH_MAX = int(os.getenv("RISK_BATCH_MAX", "5000"))
+
+@bp.route("/api/risk-prediction/batch", methods=["POST"])
+def predict_batch():
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be an object with a records list"}), 400
+    records = data.get("records")
+
+    if not isinstance(records, list) or not records:
+        return jsonify({"error": "records must be a non-empty list"}), 400
+    if len(records) > RISK_BATCH_MAX:
+        return jsonify({"error": f"At most {RISK_BATCH_MAX} records per batch"}), 413
+
+    # Validate each record, keeping per-record errors
+    results = [None] * len(records)
+    valid = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[i] = {"index": i, "error": "Invalid record"}
+            continue
+        email = record.get("email")
+        features = record.get("features", {})
+        if not email:
+            results[i] = {"index": i, "error": "Email is required"}
+        elif not features or not isinstance(features, dict):
+            results[i] = {"index": i, "email": email, "error": "Invalid or missing features"}
+        else:
+            valid.append((i, email, features))
+
+    # Score every valid record in one vectorized pass
+    try:
+        with MODEL_INFERENCE_SECONDS.time(kind="batch"):
+            matrix = risk_engine.encode_many([features for _, _, features in valid])
+            probs = risk_engine.predict_many(matrix).tolist()
+    except Exception as e:
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
+    # Save all rows with a single bulk insert
+    created_at = datetime.utcnow()
+    rows = []
+    for (i, email, _), prob in zip(valid, probs):
+        risk_percent = round(prob * 100, 2)
+        rows.append({"email": email, "risk_score": risk_percent, "created_at": created_at})
+        results[i] = {"index": i, "email": email, "ML Predicted Risk (%)": risk_percent}
+
+    try:
+        if rows:
+            db.session.execute(insert(PcosRiskEntry), rows)
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+    return jsonify({
+        "results": results,
+        "saved": len(rows),
+        "failed": len(records) - len(rows)
+    })
+
+def warm_up():
+    risk_engine.warm_up()
@@ -0,0 +1,83 @@
+import os
+import re
+
+from flask import current_app
+
+from account_purge import AccountPurger
+from analytics_buffer import AnalyticsBuffer
+from extensions import db
+from hashing import PasswordHasher
+from journal_search import JournalSearch
+from mail_outbox import OutboxDispatcher
+from metrics import ACCOUNT_PURGE_ROWS, RESPONSE_CACHE
+from models import USER_TABLES, AccountPurge, Analytics, EmailOutbox, JournalStats
+from response_cache import RedisBackend, ResponseCache
+
+# Password hashing runs in a bounded process pool; changing the method
+# (e.g. more iterations) upgrades stored hashes on the next login
+hasher = PasswordHasher(
+    method=os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000000"),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "8"))
+)
+
+# Visits and logins are buffered in memory and bulk-inserted
+analytics_buffer = AnalyticsBuffer(
+    db=db, model=Analytics,
+    batch_size=int(os.getenv("ANALYTICS_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "2")),
+    max_pending=int(os.getenv("ANALYTICS_MAX_PENDING", "50000"))
+)
+
+# Email Outbox, drained in the background
+outbox = OutboxDispatcher(db=db, model=EmailOutbox)
+
+# FTS5 on SQLite, FULLTEXT on MySQL
+journal_search = JournalSearch(db)
+
+# Per-user read responses with ETags; RESPONSE_CACHE_URL=redis://... shares
+# them between processes and hosts, RESPONSE_CACHE_MB=0 turns caching off
+response_cache = ResponseCache(
+    max_bytes=int(float(os.getenv("RESPONSE_CACHE_MB", "64")) * 1024 * 1024),
+    ttl=int(os.getenv("RESPONSE_CACHE_TTL", "300")),
+    backend=RedisBackend(os.environ["RESPONSE_CACHE_URL"]) if os.getenv("RESPONSE_CACHE_URL") else None,
+    on_lookup=lambda namespace, result: RESPONSE_CACHE.inc(namespace=namespace, result=result)
+)
+# Every namespace cached per user, for writes that touch all of a user's data
+CACHED_PER_USER = ("entries", "cycle", "recommendations", "profile")
+
+# Deleted accounts' rows are removed in small batches in the background.
+# Journal stats go last, so a row rebuilt while the journal was being purged
+# does not outlive it
+purger = AccountPurger(
+    db=db, model=AccountPurge,
+    tables=USER_TABLES + [("journal_stats", JournalStats, JournalStats.user_id)],
+    on_batch=lambda table, rows: ACCOUNT_PURGE_ROWS.inc(rows, table=table),
+    on_done=lambda email: response_cache.invalidate(email, *CACHED_PER_USER)
+)
+
+
+def init_app(app):
+    analytics_buffer.init_app(app)
+    outbox.init_app(app)
+    purger.init_app(app)
+
+
+# Utilities
+def is_valid_email(email):
+    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
+    return re.match(pattern, email)
+
+def email_values(subject, recipients, body, reply_to=None):
+    # Column values of an EmailOutbox row
+    return {
+        "subject": subject,
+        "sender": current_app.config['MAIL_USERNAME'],
+        "recipients": ", ".join(recipients),
+        "reply_to": reply_to,
+        "body": body,
+    }
+
+def enqueue_email(subject, recipients, body, reply_to=None):
+    # Added to the caller's transaction; call outbox.notify() after commit
+    db.session.add(EmailOutbox(**email_values(subject, recipients, body, reply_to)))
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+# Before config is imported: SQLite (so the engine options fit), the local
+# Gemini stand-in and password hashing in-process
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["GEMINI_FAKE"] = "1"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+from app import create_app
+from config import Config
+from extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    # A fresh database file per test, so search indexes and triggers never
+    # carry over
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+
+    app = create_app(config=TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,31 @@
+import uuid
+
+from bot_service import ConversationStore, SqlBackend
+from extensions import db
+from models import BotConversation
+
+
+def test_store_key_fits_conversation_id_column():
+    # SQLite ignores VARCHAR lengths; MySQL in strict mode rejects longer keys
+    key = ConversationStore()._key(uuid.uuid4().hex)
+    assert len(key) <= BotConversation.__table__.c.id.type.length
+
+
+def test_shared_conversation_round_trip(app):
+    store = ConversationStore(backend=SqlBackend(db, BotConversation))
+    conversation_id, history, restarted = store.open()
+    assert history is None and not restarted
+
+    store.add_turn(conversation_id, "What is PCOS?", "A hormonal condition.")
+    # A second store stands in for another worker
+    other = ConversationStore(backend=SqlBackend(db, BotConversation))
+    same_id, history, restarted = other.open(conversation_id)
+    assert same_id == conversation_id and not restarted
+    assert history == ([], [("What is PCOS?", "A hormonal condition.")])
+
+
+def test_unknown_conversation_restarts(app):
+    store = ConversationStore(backend=SqlBackend(db, BotConversation))
+    conversation_id, history, restarted = store.open("0" * 32)
+    assert conversation_id != "0" * 32
+    assert history is None and restarted
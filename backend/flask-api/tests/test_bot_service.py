@@ -0,0 +1,137 @@
+import json
+import re
+import threading
+import time
+
+import pytest
+
+import routes.bot
+from bot_service import FALLBACK_REPLY, BotService, CircuitBreaker, FakeGeminiClient, ResponseCache
+
+
+def failing(*args, **kwargs):
+    raise RuntimeError("upstream down")
+
+
+def test_cache_hit_and_miss():
+    client = FakeGeminiClient(reply="PCOS is a hormonal condition.")
+    bot = BotService(client, "test-model")
+    assert bot.reply("What is PCOS?") == ("PCOS is a hormonal condition.", "upstream")
+    # Same question after normalisation
+    assert bot.reply("what is  pcos") == ("PCOS is a hormonal condition.", "cache")
+    assert client.calls == 1
+    assert (bot.cache.hits, bot.cache.misses) == (1, 1)
+    # Follow-ups depend on the conversation, so they skip the cache
+    assert bot.reply("What is PCOS?", history=([], [("hi", "hello")]))[1] == "upstream"
+    assert client.calls == 2
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"     # "b" is now the least recently used
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.evictions == 1
+
+
+def test_in_flight_limit_rejects_past_queue_timeout():
+    client = FakeGeminiClient(delay=0.5)
+    bot = BotService(client, "test-model", max_in_flight=1, queue_timeout=0.05)
+    slow = threading.Thread(target=bot.reply, args=("first question",))
+    slow.start()
+    deadline = time.monotonic() + 2
+    while bot.in_flight < 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+    assert bot.reply("second question") == (FALLBACK_REPLY, "fallback")
+    slow.join()
+    assert client.calls == 1
+    assert bot.rejected == 1 and bot.in_flight == 0
+    # The slot is free again
+    assert bot.reply("second question")[1] == "upstream"
+
+
+def test_breaker_opens_and_falls_back():
+    client = FakeGeminiClient(reply="Fresh answer")
+    bot = BotService(client, "test-model", cache=ResponseCache(ttl=0),
+                     breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    assert bot.reply("What is PCOS?")[1] == "upstream"    # cached, already stale (ttl=0)
+
+    client.models.generate_content = failing
+    # A stale reply to the same question beats the generic fallback
+    assert bot.reply("What is PCOS?") == ("Fresh answer", "fallback")
+    assert bot.reply("Is PCOS curable?") == (FALLBACK_REPLY, "fallback")
+    assert bot.breaker.state == "open"
+
+    calls = client.calls
+    assert bot.reply("Is PCOS curable?") == (FALLBACK_REPLY, "fallback")
+    assert client.calls == calls     # refused without calling upstream
+    assert (bot.failures, bot.rejected, bot.fallbacks) == (2, 1, 3)
+
+
+def test_breaker_half_open_trial_closes_it():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+
+# ---------- Server-Sent Events ----------
+def sse_events(body):
+    # Parsed the way frontend/src/pages/PcosBot.jsx does
+    events = []
+    for raw in body.split("\n\n")[:-1]:
+        event = re.search(r"^event: (.*)$", raw, re.M)
+        data = re.search(r"^data: (.*)$", raw, re.M)
+        events.append((event and event[1], json.loads(data[1]) if data else None))
+    return events
+
+
+@pytest.fixture
+def stream_bot(monkeypatch):
+    client = FakeGeminiClient(reply="Streamed answer about PCOS care.", chunks=4)
+    bot = BotService(client, "test-model")
+    monkeypatch.setattr(routes.bot, "bot", bot)
+    return client
+
+
+def ask(app, message, **body):
+    response = app.test_client().post("/pcos-bot", json={"message": message, "stream": True, **body})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    return sse_events(response.get_data(as_text=True))
+
+
+def test_stream_sends_messages_then_done(app, stream_bot):
+    events = ask(app, "Tell me about PCOS")
+    names = [name for name, _ in events]
+    assert names == ["message"] * (len(events) - 1) + ["done"]
+    assert len(events) > 2
+    assert "".join(data["text"] for name, data in events[:-1]) == stream_bot.reply
+    done = events[-1][1]
+    assert done["restarted"] is False
+
+    # The conversation id from "done" carries the context into the next question
+    events = ask(app, "And diet?", conversation_id=done["conversation_id"])
+    assert events[-1] == ("done", {"conversation_id": done["conversation_id"], "restarted": False})
+
+
+def test_stream_fallback_is_one_message(app, stream_bot):
+    stream_bot.models.generate_content_stream = failing
+    assert ask(app, "Tell me about PCOS")[:-1] == [("message", {"text": FALLBACK_REPLY})]
+
+
+def test_stream_error_after_partial_reply(app, stream_bot):
+    def breaks_midway(*args, **kwargs):
+        yield type("Chunk", (), {"text": "Partial"})()
+        raise RuntimeError("connection reset")
+    stream_bot.models.generate_content_stream = breaks_midway
+
+    events = ask(app, "Tell me about PCOS")
+    assert events == [("message", {"text": "Partial"}), ("error", {"error": "connection reset"})]
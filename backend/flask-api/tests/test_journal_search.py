@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import insert, text
+
+from extensions import db
+from journal_search import JournalSearch
+from models import Entry
+
+
+def add_entries(user_id, *texts):
+    db.session.execute(insert(Entry), [{"user_id": user_id, "date": "2026-01-01", "mood": "Happy", "entry": t}
+                                       for t in texts])
+    db.session.commit()
+
+
+@pytest.fixture
+def search(app):
+    # Not services.journal_search, which remembers an earlier test's database
+    search = JournalSearch(db)
+    assert search.setup() and search.available
+    return search
+
+
+def test_search_stays_within_the_user(search):
+    add_entries("ana@example.com", "Long walk after yoga", "Skipped yoga today")
+    # Same words, and emails whose tokens overlap Ana's
+    add_entries("x.ana@example.com", "yoga with friends")
+    add_entries("ana@example.co", "yoga again")
+
+    results, total = search.search("ana@example.com", "yoga")
+    assert total == 2
+    assert {r["snippet"].replace("**", "") for r in results} == {"Long walk after yoga", "Skipped yoga today"}
+    assert search.search("ana@example.com", "friends") == ([], 0)
+    assert search.search("x.ana@example.com", "yoga")[1] == 1
+
+
+def test_search_follows_updates_and_deletes(search):
+    add_entries("ana@example.com", "Cramps all morning")
+    add_entries("ben@example.com", "Cramps after lunch")
+    db.session.execute(text("UPDATE entry SET user_id = 'ben@example.com' WHERE user_id = 'ana@example.com'"))
+    db.session.commit()
+    assert search.search("ana@example.com", "cramps") == ([], 0)
+    assert search.search("ben@example.com", "cramps")[1] == 2
+
+    db.session.execute(text("DELETE FROM entry"))
+    db.session.commit()
+    assert search.search("ben@example.com", "cramps") == ([], 0)
+
+
+def test_index_without_owner_is_rebuilt(app):
+    search = JournalSearch(db)
+    # entry_fts as it was before searches were scoped by user
+    db.session.execute(text("CREATE VIRTUAL TABLE entry_fts USING fts5("
+                            "entry, content='entry', content_rowid='id', tokenize='porter unicode61')"))
+    db.session.commit()
+    add_entries("ana@example.com", "Headache in the evening")
+    add_entries("ben@example.com", "Headache again")
+
+    assert not search.available
+    assert search.setup() and search.available
+    results, total = search.search("ana@example.com", "headache")
+    assert total == 1 and results[0]["snippet"] == "**Headache** in the evening"
@@ -0,0 +1,129 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from mail_outbox import OutboxDispatcher
+from models import EmailOutbox
+
+controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class SinkHandler:
+    """Keeps accepted messages; refuses nobody@ recipients, and DATA while ``data_reply`` is set."""
+
+    def __init__(self):
+        self.messages = []
+        self.data_reply = None
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("nobody@"):
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.data_reply:
+            return self.data_reply
+        self.messages.append(envelope)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def sink():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = SinkHandler()
+    server = controller.Controller(handler, hostname="127.0.0.1", port=port)
+    server.start()
+    handler.port = port
+    yield handler
+    server.stop()
+
+
+@pytest.fixture
+def outbox(app, sink):
+    app.config.update(MAIL_SERVER="127.0.0.1", MAIL_PORT=sink.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                      MAIL_USERNAME=None, MAIL_DEFAULT_SENDER="noreply@example.com",
+                      MAIL_OUTBOX_MAX_ATTEMPTS=3, MAIL_OUTBOX_BACKOFF=30)
+    # drain() only, never the background thread
+    dispatcher = OutboxDispatcher(app=app, db=db, model=EmailOutbox)
+    yield dispatcher
+    dispatcher.pool.close()
+
+
+def queue(recipient, **values):
+    row = EmailOutbox(subject="Hello", recipients=recipient, body="Hi there", **values)
+    db.session.add(row)
+    db.session.commit()
+    return row.id
+
+
+def test_sends_and_marks_sent(outbox, sink):
+    ids = [queue(f"user{i}@example.com") for i in range(3)]
+    assert outbox.drain() == 3
+    assert sorted(m.rcpt_tos[0] for m in sink.messages) == [f"user{i}@example.com" for i in range(3)]
+    for row_id in ids:
+        row = db.session.get(EmailOutbox, row_id)
+        assert (row.status, row.attempts, row.claim_token) == ("sent", 1, None)
+        assert row.sent_at is not None
+
+
+def test_transient_failure_is_retried_with_backoff(outbox, sink):
+    row_id = queue("user@example.com")
+    sink.data_reply = "451 4.3.0 Try again later"
+    before = datetime.utcnow()
+    assert outbox.drain() == 1
+    row = db.session.get(EmailOutbox, row_id)
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert "451" in row.last_error
+    assert row.next_attempt_at >= before + timedelta(seconds=30)
+
+    # Not due yet; once it is, the next attempt goes through
+    assert outbox.drain() == 0
+    sink.data_reply = None
+    row.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    assert outbox.drain() == 1
+    row = db.session.get(EmailOutbox, row_id)
+    assert (row.status, row.attempts, row.last_error) == ("sent", 2, None)
+    assert len(sink.messages) == 1
+
+
+def test_transient_failures_give_up_after_max_attempts(outbox, sink):
+    row_id = queue("user@example.com")
+    sink.data_reply = "451 4.3.0 Try again later"
+    for _ in range(3):
+        db.session.get(EmailOutbox, row_id).next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        outbox.drain()
+    row = db.session.get(EmailOutbox, row_id)
+    assert (row.status, row.attempts) == ("failed", 3)
+
+
+def test_permanent_failure_is_not_retried(outbox, sink):
+    refused = queue("nobody@example.com")
+    delivered = queue("user@example.com")
+    assert outbox.drain() == 2
+    row = db.session.get(EmailOutbox, refused)
+    assert (row.status, row.attempts) == ("failed", 1)
+    assert "550" in row.last_error
+    # The refusal doesn't cost the other message on the same connection
+    assert db.session.get(EmailOutbox, delivered).status == "sent"
+    assert [m.rcpt_tos for m in sink.messages] == [["user@example.com"]]
+
+
+def test_expired_lease_is_reclaimed(outbox, sink):
+    now = datetime.utcnow()
+    # A sender crashed mid-send, and another one is still within its lease
+    crashed = queue("crashed@example.com", status="sending", claim_token="a" * 32,
+                    locked_until=now - timedelta(seconds=1))
+    busy = queue("busy@example.com", status="sending", claim_token="b" * 32,
+                 locked_until=now + timedelta(minutes=5))
+    assert outbox.drain() == 1
+    assert db.session.get(EmailOutbox, crashed).status == "sent"
+    row = db.session.get(EmailOutbox, busy)
+    assert (row.status, row.claim_token) == ("sending", "b" * 32)
+    assert [m.rcpt_tos for m in sink.messages] == [["crashed@example.com"]]
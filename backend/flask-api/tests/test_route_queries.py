@@ -0,0 +1,9 @@
+from commands import ensure_indexes, explain_route_queries
+
+
+def test_route_queries_use_indexes(app):
+    ensure_indexes()
+    results = explain_route_queries()
+    assert results
+    scans = {name: plan for name, (uses_index, plan) in results.items() if not uses_index}
+    assert not scans, scans
@@ -0,0 +1,6 @@
+# Entry point for WSGI servers, e.g. the chatbot and CRUD pools separately:
+#   APP_BLUEPRINTS=bot gunicorn -c gunicorn.conf.py wsgi:app
+#   APP_BLUEPRINTS=auth,journal,risk,cycle,recommendations,admin gunicorn -c gunicorn.conf.py wsgi:app
+from app import create_app
+
+app = create_app()
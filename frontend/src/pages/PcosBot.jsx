@@ -1,5 +1,4 @@
 import React, { useState } from "react";
-import axios from "axios";
 import ReactMarkdown from "react-markdown";
 import { FaUserCircle } from "react-icons/fa";
 import "./PcosBot.css";
@@ -13,6 +12,8 @@ export default function PcosBot() {
   ]);
   const [input, setInput] = useState("");
   const [isLoading, setIsLoading] = useState(false);
+  // Lets the server keep context for follow-up questions
+  const [conversationId, setConversationId] = useState(null);
 
   const sendMessage = async () => {
     if (!input.trim()) return;
@@ -27,21 +28,53 @@ export default function PcosBot() {
     setInput("");
     setIsLoading(true);
 
+    // Replace the last (bot) message with the given text
+    const setBotText = (text) =>
+      setMessages((prev) => [...prev.slice(0, -1), { sender: "bot", text }]);
+
     try {
-      const res = await axios.post("http://127.0.0.1:5000/pcos-bot", {
-        message: userMessage.text,
+      // Stream the reply (Server-Sent Events) so tokens show up as they arrive
+      const res = await fetch("http://127.0.0.1:5000/pcos-bot", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+        body: JSON.stringify({
+          message: userMessage.text,
+          stream: true,
+          conversation_id: conversationId,
+        }),
       });
+      if (!res.ok || !res.body) throw new Error("Bad response");
 
-      // Replace "Preparing your answer..." with bot reply
-      setMessages((prev) => {
-        const messagesWithoutPreparing = prev.slice(0, -1); // remove last message
-        return [...messagesWithoutPreparing, { sender: "bot", text: res.data.reply }];
-      });
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let reply = "";
+      let failed = false;
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = (raw.match(/^event: (.*)$/m) || [])[1];
+          const data = (raw.match(/^data: (.*)$/m) || [])[1];
+          if (event === "message" && data) {
+            reply += JSON.parse(data).text;
+            setBotText(reply);
+          } else if (event === "done" && data) {
+            setConversationId(JSON.parse(data).conversation_id);
+          } else if (event === "error") {
+            failed = true;
+          }
+        }
+      }
+      if (failed || !reply) throw new Error("Stream failed");
     } catch (err) {
-      setMessages((prev) => {
-        const messagesWithoutPreparing = prev.slice(0, -1);
-        return [...messagesWithoutPreparing, { sender: "bot", text: "Error connecting to server." }];
-      });
+      setBotText("Error connecting to server.");
     }
 
     setIsLoading(false);
@@ -61,16 +61,19 @@ export default function CycleTracker() {
     fetchEntries();
   }, [email]);
 
+  // Phases are [start, end] date ranges; ISO dates compare as strings
+  const inRange = (range, date) => range && range[0] <= date && date <= range[1];
+
   // Get color based on day and phase data
   const getCircleColor = (day) => {
-    if (!phases?.period_days) return "";
+    if (!phases?.period) return "";
 
     const thisDate = new Date(Date.UTC(year, month, day)).toISOString().substring(0, 10);
 
-    if (phases.period_days.some((d) => d.date === thisDate)) return "period";
-    if (phases.ovulation_day?.date === thisDate) return "ovulation";
-    if (phases.fertile_window?.some((d) => d.date === thisDate)) return "fertile";
-    if (phases.expected_next_period?.some((d) => d.date === thisDate)) return "next-period";
+    if (inRange(phases.period, thisDate)) return "period";
+    if (phases.ovulation === thisDate) return "ovulation";
+    if (inRange(phases.fertile_window, thisDate)) return "fertile";
+    if (inRange(phases.next_period, thisDate)) return "next-period";
 
     return "";
   };
@@ -90,11 +93,11 @@ export default function CycleTracker() {
   };
 
   const goNextMonth = () => {
-    if (!phases?.expected_next_period?.length) return;
+    if (!phases?.next_period) return;
 
-    const npEnd = new Date(phases.expected_next_period.at(-1).date);
-    const cycleMonth = new Date(phases.period_days[0].date).getMonth();
-    const cycleYear = new Date(phases.period_days[0].date).getFullYear();
+    const npEnd = new Date(phases.next_period[1]);
+    const cycleMonth = new Date(phases.period[0]).getMonth();
+    const cycleYear = new Date(phases.period[0]).getFullYear();
 
     if (
       (npEnd.getMonth() === cycleMonth + 1 && npEnd.getFullYear() === cycleYear) ||
@@ -177,17 +180,9 @@ export default function CycleTracker() {
           {entries.map((e, idx) => (
             <tr key={idx}>
               <td>{e.period_date}</td>
-              <td>{e.phases?.ovulation_day?.date || "-"}</td>
-              <td>
-                {e.phases?.fertile_window
-                  ?.map((day) => day.date)
-                  .join(" - ") || "-"}
-              </td>
-              <td>
-                {e.phases?.expected_next_period
-                  ?.map((day) => day.date)
-                  .join(" - ") || "-"}
-              </td>
+              <td>{e.phases?.ovulation || "-"}</td>
+              <td>{e.phases?.fertile_window?.join(" - ") || "-"}</td>
+              <td>{e.phases?.next_period?.join(" - ") || "-"}</td>
             </tr>
           ))}
         </tbody>